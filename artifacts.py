@@ -0,0 +1,183 @@
+"""
+Precomputed datasets of the dashboard, exported as static Parquet artifacts.
+
+For a snapshot version, `build` runs the same code the dashboard runs and writes every dataset the
+pages read to ARTIFACTS_DIR/<snapshot version>/, together with a manifest:
+
+    cube              counts per every dimension the pages group by, see cube.py
+    overview_counts   counts per year, quarter and category (overview bars)
+    quarterly_trends  counts per year-quarter and category (overview trends)
+    october7          counts per category, period and district, normalized per quarter
+    heatmap           counts per crime type, year and Merhav of the map
+    district_facts    crime, employment and population per district and year
+    statistic_groups  counts per year and statistic group, uncategorized ones included (crime_dashboard.py)
+
+The artifacts of a version are written to a temporary directory that is renamed into place when
+complete, so a reader never sees half of them. When the artifacts of its snapshot exist, the
+dashboard loads them instead of building the tables from the records (see refresher.DataVersion).
+The heatmap also depends on the police boundaries, so its artifact records their checksum and is not
+loaded once they changed.
+CI can therefore build them once per data release and ship them with the snapshot:
+
+    python artifacts.py build --update   # update the snapshot, then build its artifacts
+    python artifacts.py build            # build the artifacts of the current snapshot
+    python artifacts.py info             # show the artifacts of the current snapshot
+"""
+import argparse
+import json
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import snapshot_store
+from cube import rollup
+
+ARTIFACTS_DIR = os.environ.get("ARTIFACTS_DIR", os.path.join("data", "artifacts"))
+ARTIFACTS_SCHEMA = 1  # bumped when a table changes shape, older artifacts are then ignored
+KEEP_VERSIONS = 3
+
+# the tables only exported for other consumers, the pages roll them up from the cube
+EXPORT_ONLY = {
+    "overview_counts": lambda data: rollup(data.cube(), ["Year", "Quarter", "Category"]),
+    "quarterly_trends": lambda data: rollup(data.cube(), ["YearQuarter", "Category"]),
+}
+# the tables the pages load, built by the refresher.DataVersion method of the same name
+PAGE_TABLES = ["cube", "october7", "heatmap", "district_facts", "statistic_groups"]
+
+
+def _boundaries_checksum():
+    # imported here, only the heatmap needs geopandas
+    from geo import ZIP_PATH, file_checksum
+    return file_checksum(ZIP_PATH)
+
+
+# inputs of a table besides the snapshot: table name -> function returning their checksum. An artifact
+# built from other inputs than the current ones is ignored.
+INPUT_CHECKSUMS = {"heatmap": _boundaries_checksum}
+
+
+def read_manifest(version, root=None):
+    """
+    :param version: snapshot version
+    :param root: artifact directory, defaults to ARTIFACTS_DIR
+    :return: the manifest dict, or None if there are no usable artifacts for this version
+    """
+    try:
+        with open(os.path.join(root or ARTIFACTS_DIR, version, "manifest.json"), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return None
+    return manifest if manifest.get("schema") == ARTIFACTS_SCHEMA else None
+
+
+def read_artifact(version, name, root=None):
+    """
+    :param version: snapshot version
+    :param name: table name
+    :param root: artifact directory, defaults to ARTIFACTS_DIR
+    :return: pandas df, or None if the table was not exported for this version, or was exported from
+        other inputs than the current ones (see INPUT_CHECKSUMS)
+    """
+    root = root or ARTIFACTS_DIR
+    manifest = read_manifest(version, root)
+    if manifest is None or name not in manifest["artifacts"]:
+        return None
+    artifact = manifest["artifacts"][name]
+    if name in INPUT_CHECKSUMS and artifact.get("input_checksum") != INPUT_CHECKSUMS[name]():
+        return None
+    return pd.read_parquet(os.path.join(root, version, artifact["file"]))
+
+
+def build_artifacts(version=None, snapshot_root=None, root=None):
+    """
+    Builds and writes every table of a snapshot version
+    :param version: snapshot version, defaults to the current one
+    :param snapshot_root: snapshot directory, defaults to snapshot_store.SNAPSHOT_DIR
+    :param root: artifact directory, defaults to ARTIFACTS_DIR
+    :return: the manifest dict
+    """
+    from refresher import DataVersion
+
+    root = root or ARTIFACTS_DIR
+    version = version or snapshot_store.current_version(snapshot_root)
+    if version is None:
+        raise FileNotFoundError("no snapshot to build the artifacts from, run snapshot_store.py refresh")
+    snapshot = snapshot_store.read_manifest(version, snapshot_root)
+    data = DataVersion(version, datetime.fromisoformat(snapshot["created"]), snapshot_root, use_artifacts=False)
+
+    tmp_dir = os.path.join(root, f".{version}.tmp")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    artifacts = {}
+    builders = {**{name: getattr(DataVersion, name) for name in PAGE_TABLES}, **EXPORT_ONLY}
+    for name, build in builders.items():
+        start = time.perf_counter()
+        df = build(data)
+        file_name = f"{name}.parquet"
+        df.to_parquet(os.path.join(tmp_dir, file_name), index=isinstance(df.index, pd.MultiIndex))
+        artifacts[name] = {
+            "file": file_name,
+            "rows": len(df),
+            "columns": list(df.columns),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
+        if name in INPUT_CHECKSUMS:
+            artifacts[name]["input_checksum"] = INPUT_CHECKSUMS[name]()
+
+    manifest = {
+        "version": version,
+        "schema": ARTIFACTS_SCHEMA,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "snapshot_created": snapshot["created"],
+        "artifacts": artifacts,
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    target = os.path.join(root, version)
+    if os.path.exists(target):
+        # a rebuild of the same version, readers of the old directory keep their open files
+        shutil.rmtree(target)
+    os.rename(tmp_dir, target)
+    _prune(root, keep=version)
+    return manifest
+
+
+def _prune(root, keep):
+    versions = sorted(
+        name for name in os.listdir(root)
+        if os.path.isdir(os.path.join(root, name)) and not name.startswith(".")
+    )
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the dashboard datasets as Parquet artifacts")
+    parser.add_argument("command", choices=["build", "info"])
+    parser.add_argument("--update", action="store_true", help="update the snapshot before building")
+    parser.add_argument("--version", help="snapshot version, defaults to the current one")
+    parser.add_argument("--root", default=ARTIFACTS_DIR, help="artifact directory")
+    parser.add_argument("--snapshot-root", default=snapshot_store.SNAPSHOT_DIR, help="snapshot directory")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        if args.update:
+            os.makedirs(args.snapshot_root, exist_ok=True)
+            snapshot_store.update(args.snapshot_root)
+        start = time.perf_counter()
+        manifest = build_artifacts(args.version, args.snapshot_root, args.root)
+        print(f"built the artifacts of {manifest['version']} in {time.perf_counter() - start:.1f}s")
+
+    version = args.version or snapshot_store.current_version(args.snapshot_root)
+    manifest = read_manifest(version, args.root) if version else None
+    if manifest is None:
+        print("no artifacts")
+    else:
+        print(f"artifacts of {manifest['version']} created {manifest['created']}")
+        for name, artifact in manifest["artifacts"].items():
+            print(f"  {name:<17} {artifact['rows']:>8} rows  {artifact['seconds']:>7.3f}s")
@@ -0,0 +1,85 @@
+"""
+Row-wise categorize_statistic_group().apply against the vectorized categorize().
+
+The legacy row-wise function is timed too, and all outputs are checked to be identical.
+
+    python benchmarks/bench_categorize.py --rows 1000000 10000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crime_data import categorize, categorize_statistic_group  # noqa: E402
+from datastore_stub import STATISTIC_GROUPS  # noqa: E402
+
+
+def legacy_categorize_statistic_group(stat_group):
+    """
+    categorize_statistic_group as it was before the lookup table, kept as the reference output
+    """
+    categories = {
+        "עבירות פליליות כלליות": ['עבירות כלפי הרכוש', 'עבירות נגד גוף', 'עבירות נגד אדם', 'עבירות מין'],
+        "עבירות מוסר וסדר ציבורי": ['עבירות כלפי המוסר', 'עבירות סדר ציבורי'],
+        "עבירות ביטחון": ['עבירות בטחון'],
+        "עבירות כלכליות ומנהליות": ['עבירות כלכליות', 'עבירות מנהליות', 'עבירות רשוי'],
+        "עבירות תנועה": ['עבירות תנועה'],
+        "עבירות מרמה": ['עבירות מרמה']
+    }
+    for category, types in categories.items():
+        if stat_group in types:
+            return category
+    return None
+
+
+def statistic_groups(rows, seed=0):
+    """
+    :param rows: number of values
+    :param seed: random seed
+    :return: object Series of statistic groups, sharing one str object per distinct value
+    """
+    codes = np.random.default_rng(seed).integers(0, len(STATISTIC_GROUPS), rows)
+    return pd.Series(pd.Categorical.from_codes(codes, STATISTIC_GROUPS)).astype(object)
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def run(rows):
+    """
+    :param rows: number of synthetic records
+    :return: dict with the timing of every implementation
+    """
+    groups = statistic_groups(rows)
+    expected, legacy_time = _timed(lambda: groups.apply(legacy_categorize_statistic_group))
+    lookup, apply_time = _timed(lambda: groups.apply(categorize_statistic_group))
+    result, vectorized_time = _timed(lambda: categorize(groups))
+    categorical = groups.astype("category")
+    from_codes, codes_time = _timed(lambda: categorize(categorical))
+    for other in (lookup, result, from_codes):
+        pd.testing.assert_series_equal(other.astype(object), expected.astype(object), check_names=False)
+    return {
+        "rows": rows,
+        "legacy_apply_s": round(legacy_time, 4),
+        "lookup_apply_s": round(apply_time, 4),
+        "vectorized_s": round(vectorized_time, 4),
+        "vectorized_categorical_s": round(codes_time, 4),
+        "speedup": round(legacy_time / vectorized_time, 1),
+        "speedup_categorical": round(legacy_time / codes_time, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000_000, 10_000_000])
+    args = parser.parse_args()
+    for rows in args.rows:
+        print(run(rows))
@@ -0,0 +1,74 @@
+"""
+Payload size and server time of the Merhav choropleth, before and after the cached simplified GeoJSON.
+
+    python benchmarks/bench_geojson.py
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+import plotly.express as px
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import geo  # noqa: E402
+from geo import SIMPLIFY_TOLERANCES, boundaries_geojson, prepare_merhav_boundaries  # noqa: E402
+
+REPEAT = 5
+
+
+def _figure(gdf, geojson):
+    return px.choropleth_mapbox(
+        gdf,
+        geojson=geojson,
+        locations='unique_id',
+        color="record_count",
+        hover_name="MerhavName",
+        hover_data={"record_count": True, 'unique_id': False},
+        mapbox_style="carto-positron",
+    )
+
+
+def _per_rerun(build):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fig = build()
+    return (time.perf_counter() - start) / REPEAT, len(fig.to_json().encode("utf-8"))
+
+
+def run():
+    """
+    :return: list of dicts with the payload bytes and the server time per rerun of every variant
+    """
+    warnings.simplefilter("ignore")
+    with tempfile.TemporaryDirectory() as tmp:
+        # the prepared boundaries go to the temporary directory, the data/ of the dashboard is left as is
+        geo.GEO_CACHE_DIR = os.path.join(tmp, "geo")
+        gdf = prepare_merhav_boundaries().copy(deep=False)
+    gdf['record_count'] = 0
+    results = []
+
+    seconds, payload = _per_rerun(lambda: _figure(gdf, json.loads(gdf.to_json())))
+    results.append({"variant": "to_json per rerun", "server_s": round(seconds, 4), "payload_bytes": payload})
+
+    for detail in SIMPLIFY_TOLERANCES:
+        start = time.perf_counter()
+        geojson = boundaries_geojson(gdf, detail)
+        build_s = time.perf_counter() - start
+        seconds, payload = _per_rerun(lambda: _figure(gdf, geojson))
+        results.append({
+            "variant": f"cached {detail}",
+            "build_once_s": round(build_s, 4),
+            "server_s": round(seconds, 4),
+            "payload_bytes": payload,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    for result in run():
+        print(result)
@@ -0,0 +1,55 @@
+"""
+Download and preparation of the yearly resources, in one process against a pool of worker processes.
+
+The records come from the stub datastore. Every run prepares all five years; the frames of the
+parallel runs are checked against the serial ones. The speedup is bounded by the number of cores
+and by the five yearly resources.
+
+    python benchmarks/bench_prepare.py --rows 200000 --workers 1 2 3 5
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datastore_stub import StubDatastore, synthetic_resources  # noqa: E402
+from parallel_prepare import prepare_all  # noqa: E402
+
+
+def run(rows, workers, repeat):
+    """
+    :param rows: synthetic records per year
+    :param workers: list of worker counts, 1 runs in this process
+    :param repeat: runs per worker count, the best one is kept
+    :return: list of dicts with the seconds and the speedup against one worker
+    """
+    results = []
+    with StubDatastore(synthetic_resources(rows)) as stub:
+        expected = prepare_all(base_url=stub.base_url, workers=1)
+        for count in workers:
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                frames = prepare_all(base_url=stub.base_url, workers=count)
+                seconds.append(time.perf_counter() - start)
+            for year, df in expected.items():
+                pd.testing.assert_frame_equal(frames[year], df)
+            results.append({"rows_per_year": rows, "workers": count, "seconds": round(min(seconds), 3)})
+    for result in results:
+        result["speedup"] = round(results[0]["seconds"] / result["seconds"], 2)
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 3, 5])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(f"{os.cpu_count()} cpus")
+    for result in run(args.rows, args.workers, args.repeat):
+        print(result)
@@ -0,0 +1,62 @@
+"""
+Memory held by N concurrent sessions reading the crime records, st.cache_data against the shared frame.
+
+st.cache_data is modelled by what it does on every call, unpickling the cached bytes into a new frame.
+The shared frame is one object handed out as shared_data.view(). Every session also derives a column,
+like the pages do, to show the views stay zero-copy for the columns they only read.
+
+    python benchmarks/bench_shared_data.py --rows 100000 --sessions 1 10 100
+"""
+import argparse
+import os
+import pickle
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from crime_data import finalize, prepare_year  # noqa: E402
+from datastore_stub import synthetic_frame  # noqa: E402
+from shared_data import view  # noqa: E402
+
+
+def _session(df):
+    df["Reversed"] = df["Category"].cat.rename_categories(lambda label: label[::-1])
+    return df
+
+
+def _held_mb(sessions, get):
+    tracemalloc.start()
+    held = [_session(get()) for _ in range(sessions)]
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del held
+    return round(current / 2 ** 20, 2)
+
+
+def run(rows, sessions):
+    """
+    :param rows: number of synthetic records
+    :param sessions: list of session counts
+    :return: list of dicts with the memory the sessions hold in MB
+    """
+    df = finalize(prepare_year(synthetic_frame(rows, 2024), 2024))
+    cached = pickle.dumps(df)
+    results = []
+    for count in sessions:
+        results.append({
+            "rows": rows,
+            "sessions": count,
+            "cache_data_mb": _held_mb(count, lambda: pickle.loads(cached)),
+            "shared_view_mb": _held_mb(count, lambda: view(df)),
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+    for result in run(args.rows, args.sessions):
+        print(result)
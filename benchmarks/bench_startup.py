@@ -0,0 +1,94 @@
+"""
+Cold import time and time to first chart of every dashboard page.
+
+Every measurement runs in a fresh interpreter, like a new server process. The records come from the
+stub datastore and the snapshot, heatmap and boundary caches are built before timing, so the time to
+first chart is reading them from disk and drawing the page, not downloading.
+
+    python benchmarks/bench_startup.py --rows 20000
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from datastore_stub import StubDatastore, synthetic_resources  # noqa: E402
+from snapshot_store import refresh  # noqa: E402
+
+PAGES = ["views.overview", "views.merhav_map", "views.october7", "views.employment"]
+
+# every library the single-script dashboard imported on each rerun, for reference
+ALL_LIBRARIES = "streamlit, geopandas, matplotlib.pyplot, seaborn, plotly.express, plotly.graph_objects"
+
+IMPORT_SCRIPT = """
+import time
+start = time.perf_counter()
+import {modules}
+print(time.perf_counter() - start)
+"""
+
+FIRST_CHART_SCRIPT = """
+import time
+from streamlit.testing.v1 import AppTest
+start = time.perf_counter()
+at = AppTest.from_string("import {module}\\n{module}.render()", default_timeout=600)
+at.run()
+assert not at.exception, [e.value for e in at.exception]
+print(time.perf_counter() - start)
+"""
+
+
+def _fresh(script, env):
+    output = subprocess.run(
+        [sys.executable, "-c", script], cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def run(rows, repeat):
+    """
+    :param rows: synthetic records per year
+    :param repeat: fresh interpreters per measurement, the best one is kept
+    :return: list of dicts with the seconds of every page
+    """
+    with tempfile.TemporaryDirectory() as tmp, StubDatastore(synthetic_resources(rows)) as stub:
+        env = dict(
+            os.environ,
+            PYTHONPATH=ROOT,
+            DATASTORE_URL=stub.base_url,
+            SNAPSHOT_DIR=os.path.join(tmp, "snapshots"),
+            HEATMAP_DIR=os.path.join(tmp, "heatmap"),
+            GEO_CACHE_DIR=os.path.join(tmp, "geo"),
+        )
+        os.makedirs(env["SNAPSHOT_DIR"])
+        refresh(env["SNAPSHOT_DIR"], base_url=stub.base_url)
+
+        results = [{
+            "page": "all libraries",
+            "cold_import_s": round(min(_fresh(IMPORT_SCRIPT.format(modules=ALL_LIBRARIES), env)
+                                       for _ in range(repeat)), 3),
+        }]
+        for module in PAGES:
+            # builds the on-disk caches of the page
+            _fresh(FIRST_CHART_SCRIPT.format(module=module), env)
+            results.append({
+                "page": module,
+                "cold_import_s": round(min(_fresh(IMPORT_SCRIPT.format(modules=module), env)
+                                           for _ in range(repeat)), 3),
+                "first_chart_s": round(min(_fresh(FIRST_CHART_SCRIPT.format(module=module), env)
+                                           for _ in range(repeat)), 3),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for result in run(args.rows, args.repeat):
+        print(result)
@@ -0,0 +1,81 @@
+"""
+Peak memory of loading the yearly resources: whole JSON bodies decoded into lists of records, against
+the bodies streamed into typed frames (see record_stream.py).
+
+Every measurement runs in a fresh interpreter, so the peak resident size of one load is not hidden
+by an earlier one. The records come from the stub datastore, served by this process. The peak is
+reported above the resident size the interpreter had once its modules were imported, next to the
+size of the prepared frames. The peak is read from /proc, so the benchmark runs on Linux only.
+
+    python benchmarks/bench_stream.py --rows 200000
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from datastore_stub import StubDatastore, synthetic_resources  # noqa: E402
+
+LOAD_SCRIPT = """
+import json, time
+import datastore
+from crime_data import memory_usage_mb, prepare_year
+
+def status_mb(field):
+    # VmRSS / VmHWM (the peak) of this process. Unlike ru_maxrss, VmHWM starts over in the new
+    # interpreter instead of carrying the peak of the parent that forked it.
+    with open("/proc/self/status") as f:
+        return next(int(line.split()[1]) for line in f if line.startswith(field + ":")) / 2 ** 10
+
+start_rss = status_mb("VmRSS")
+start = time.perf_counter()
+loaded = datastore.fetch_all(base_url={base_url!r}, frames={frames})
+frames = {{year: prepare_year(loaded.pop(year), year) for year in sorted(loaded)}}
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "peak_rss_growth_mb": status_mb("VmHWM") - start_rss,
+    "frames_mb": sum(memory_usage_mb(df) for df in frames.values()),
+}}))
+"""
+
+
+def _fresh(base_url, frames):
+    output = subprocess.run(
+        [sys.executable, "-c", LOAD_SCRIPT.format(base_url=base_url, frames=frames)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run(rows, repeat):
+    """
+    :param rows: synthetic records per year
+    :param repeat: fresh interpreters per path, the lowest peak is kept
+    :return: list of dicts with the seconds and the peak memory of every path
+    """
+    results = []
+    with StubDatastore(synthetic_resources(rows)) as stub:
+        for path, frames in (("records", False), ("stream", True)):
+            runs = [_fresh(stub.base_url, frames) for _ in range(repeat)]
+            best = min(runs, key=lambda result: result["peak_rss_growth_mb"])
+            results.append({
+                "path": path,
+                "rows_per_year": rows,
+                "seconds": round(min(result["seconds"] for result in runs), 3),
+                "peak_rss_growth_mb": round(best["peak_rss_growth_mb"], 1),
+                "frames_mb": round(best["frames_mb"], 1),
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    for result in run(args.rows, args.repeat):
+        print(result)
@@ -0,0 +1,305 @@
+"""
+Offline benchmark suite: ingestion, preprocessing, aggregation and rendering on synthetic records.
+
+The stages call the functions the dashboard runs, on synthetic records with the schema of the
+data.gov.il resources, split evenly over the five yearly resources. Up to --api-max-rows the records
+are downloaded from the local stub datastore, like the dashboard does. Larger sizes would not fit as
+JSON in memory, so they start from categorical frames instead. Every stage reports its wall time and
+how far the resident size of the process grew above its size at the start of the stage, sampled
+every few milliseconds, so Arrow and other native buffers are counted too. With --trace-memory the
+peak of the Python and numpy allocations traced by tracemalloc is reported as well, at the cost of
+much slower stages.
+
+    python benchmarks/suite.py --rows 100000 1000000 10000000 --output bench.json
+    python benchmarks/suite.py --rows 100000 --baseline bench.json   # compare with an earlier run
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import warnings
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+import datastore  # noqa: E402
+import figures  # noqa: E402
+import geo  # noqa: E402
+import heatmap_data  # noqa: E402
+import snapshot_store  # noqa: E402
+from crime_data import categorize, categorize_statistic_group, concat_frames, finalize, prepare_year  # noqa: E402
+from cube import build_cube, rollup  # noqa: E402
+from datastore_stub import StubDatastore, synthetic_frame  # noqa: E402
+from october7_data import district_counts  # noqa: E402
+
+SIZES = [100_000, 1_000_000, 10_000_000]
+API_MAX_ROWS = 1_000_000
+PAGES = ["views.overview", "views.merhav_map", "views.october7", "views.employment"]
+SLOWER = 1.2  # a stage this much slower than the baseline is reported as a regression
+
+
+def _rss():
+    # resident size in bytes, from /proc on Linux, else the peak so far (kilobytes on Linux, bytes on macOS)
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+class _RssSampler(threading.Thread):
+    """
+    Samples the resident size of the process until stopped
+    """
+
+    def __init__(self, interval=0.005):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.start_rss = self.peak = _rss()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            self.peak = max(self.peak, _rss())
+
+    def stop(self):
+        self._done.set()
+        self.join()
+        self.peak = max(self.peak, _rss())
+        return self.peak - self.start_rss
+
+
+class Recorder:
+    """
+    Collects the time and peak memory of every stage
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name, rows=None, **details):
+        if self.trace_memory:
+            tracemalloc.start()
+        sampler = _RssSampler()
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            result = {
+                "stage": name,
+                "rows": rows,
+                "seconds": round(seconds, 4),
+                "peak_rss_growth_mb": round(sampler.stop() / 2 ** 20, 1),
+            }
+            if self.trace_memory:
+                result["traced_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+                tracemalloc.stop()
+            self.stages.append({**result, **details})
+
+
+def _years(rows):
+    years = sorted(datastore.RESOURCE_IDS)
+    per_year = np.full(len(years), rows // len(years))
+    per_year[:rows % len(years)] += 1
+    return dict(zip(years, per_year.tolist()))
+
+
+def _ingest(recorder, rows, api_max_rows):
+    """
+    :return: dict of year -> prepared frame
+    """
+    years = _years(rows)
+    if rows > api_max_rows:
+        raw = {year: synthetic_frame(count, year, categorical=True) for year, count in years.items()}
+        with recorder.stage("prepare_year", rows, source="frames"):
+            return {year: prepare_year(df, year) for year, df in raw.items()}
+
+    resources = {
+        datastore.RESOURCE_IDS[year]: synthetic_frame(count, year).to_dict("records")
+        for year, count in years.items()
+    }
+    with StubDatastore(resources) as stub:
+        with recorder.stage("api_fetch", rows, source="stub datastore"):
+            records = datastore.fetch_all(base_url=stub.base_url, frames=True)
+    del resources
+    with recorder.stage("prepare_year", rows, source="api frames"):
+        return {year: prepare_year(year_records, year) for year, year_records in records.items()}
+
+
+def _aggregations(recorder, rows, cube):
+    with recorder.stage("overview_rollups", rows):
+        for year in [None] + sorted(cube["Year"].unique().tolist()):
+            year_filter = {} if year is None else {"Year": year}
+            rollup(cube, ["Category"], **year_filter)
+            rollup(cube, ["Category", "Quarter"], **year_filter)
+    with recorder.stage("trends_rollup", rows):
+        rollup(cube, ["YearQuarter", "Category"])
+    with recorder.stage("october7_rollup", rows):
+        district_counts(cube)
+    with recorder.stage("employment_rollup", rows):
+        rollup(cube, ["Year", "PoliceDistrict"])
+
+
+def _render(recorder, rows):
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    st.cache_resource.clear()
+    figures.overview_figures.clear()
+    figures.chart_specs.clear()
+    for module in PAGES:
+        at = AppTest.from_string(f"import {module}\n{module}.render()", default_timeout=1800)
+        for run in ("first", "rerun"):
+            with recorder.stage(f"render_{module.split('.')[-1]}_{run}", rows):
+                at.run()
+            if at.exception:
+                raise RuntimeError(f"{module}: {[e.value for e in at.exception]}")
+
+
+def run_size(recorder, rows, api_max_rows, render=True):
+    """
+    Runs every stage that depends on the number of records
+    :param recorder: Recorder
+    :param rows: total number of synthetic records
+    :param api_max_rows: largest size downloaded from the stub datastore
+    :param render: also time the pages
+    """
+    frames = _ingest(recorder, rows, api_max_rows)
+
+    # the text values as the API returns them, so the row-wise apply really runs once per row
+    groups = pd.concat([df["StatisticGroup"].astype(object) for df in frames.values()], ignore_index=True)
+    with recorder.stage("categorize_apply", rows):
+        groups.apply(categorize_statistic_group)
+    with recorder.stage("categorize_vectorized", rows):
+        categorize(groups)
+    del groups
+
+    with recorder.stage("concat_finalize", rows):
+        df = finalize(concat_frames([frames[year] for year in sorted(frames)]))
+    with recorder.stage("snapshot_write", rows):
+        snapshot_store.write_snapshot(frames)
+    del frames
+    with recorder.stage("snapshot_read", rows):
+        snapshot_store.load_snapshot()
+
+    with recorder.stage("build_cube", rows):
+        cube = build_cube(df)
+    del df
+    _aggregations(recorder, rows, cube)
+
+    merhav_names = geo.prepare_merhav_boundaries()["MerhavName"]
+    with recorder.stage("heatmap_dataset", rows):
+        heatmap_data.build_heatmap_dataset(snapshot_store.iter_partitions(), merhav_names)
+
+    if render:
+        _render(recorder, rows)
+
+
+def run_boundaries(recorder):
+    """
+    Runs the stages of the Merhav boundaries, which do not depend on the records
+    """
+    with recorder.stage("gdb_read"):
+        gdf = geo.read_merhav_boundaries()
+    with recorder.stage("gdb_prepare_cold"):
+        geo.prepare_merhav_boundaries()
+    with recorder.stage("gdb_prepare_cached"):
+        geo.prepare_merhav_boundaries()
+    with recorder.stage("boundaries_geojson", detail=geo.MAP_DETAIL):
+        geo.boundaries_geojson(gdf)
+
+
+def run(sizes, api_max_rows=API_MAX_ROWS, render=True, trace_memory=False):
+    """
+    :param sizes: list of total record counts
+    :param api_max_rows: largest size downloaded from the stub datastore
+    :param render: also time the pages
+    :param trace_memory: also report the tracemalloc peak of every stage
+    :return: dict with the environment and the list of stages
+    """
+    recorder = Recorder(trace_memory)
+    with tempfile.TemporaryDirectory() as tmp:
+        # every cache goes to the temporary directory, the data/ of the dashboard is left as is
+        snapshot_store.SNAPSHOT_DIR = os.path.join(tmp, "snapshots")
+        heatmap_data.HEATMAP_DIR = os.path.join(tmp, "heatmap")
+        geo.GEO_CACHE_DIR = os.path.join(tmp, "geo")
+        os.makedirs(snapshot_store.SNAPSHOT_DIR)
+        run_boundaries(recorder)
+        for rows in sizes:
+            run_size(recorder, rows, api_max_rows, render)
+            shutil.rmtree(heatmap_data.HEATMAP_DIR, ignore_errors=True)
+    return {
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "stages": recorder.stages,
+    }
+
+
+def compare(result, baseline, slower=SLOWER):
+    """
+    :param result: output of run
+    :param baseline: output of an earlier run
+    :param slower: ratio from which a stage counts as a regression
+    :return: list of dicts per stage found in both, with the time ratio to the baseline
+    """
+    previous = {(stage["stage"], stage["rows"]): stage for stage in baseline["stages"]}
+    rows = []
+    for stage in result["stages"]:
+        before = previous.get((stage["stage"], stage["rows"]))
+        if before is None or not before["seconds"]:
+            continue
+        ratio = stage["seconds"] / before["seconds"]
+        rows.append({
+            "stage": stage["stage"],
+            "rows": stage["rows"],
+            "seconds_ratio": round(ratio, 2),
+            "peak_rss_growth_mb_change": round(stage["peak_rss_growth_mb"] - before["peak_rss_growth_mb"], 1),
+            "regression": ratio >= slower,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=SIZES, help="total synthetic records")
+    parser.add_argument("--api-max-rows", type=int, default=API_MAX_ROWS,
+                        help="largest size downloaded from the stub datastore")
+    parser.add_argument("--no-render", action="store_true", help="skip timing the pages")
+    parser.add_argument("--trace-memory", action="store_true", help="also trace the allocations, slower")
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    parser.add_argument("--baseline", help="JSON of an earlier run to compare with")
+    args = parser.parse_args()
+
+    warnings.simplefilter("ignore")
+    result = run(args.rows, args.api_max_rows, not args.no_render, args.trace_memory)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            result["comparison"] = compare(result, json.load(f))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    else:
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    if any(row["regression"] for row in result.get("comparison", [])):
+        sys.exit(1)
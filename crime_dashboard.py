@@ -1,16 +1,21 @@
 import streamlit as st
-import pandas as pd
-import requests
-import matplotlib.pyplot as plt
 from matplotlib import rcParams
+from matplotlib.figure import Figure
+
+from crime_data import reverse_labels
+from figures import dashboard_figures
+from loaders import load_data_version, load_statistic_group_counts, pin_data
 
 # Set Matplotlib font to display Hebrew
 rcParams['font.family'] = 'Arial'
 rcParams['axes.unicode_minus'] = False  # Ensure minus signs display correctly
 
+# st.pyplot rasterizes at this resolution, the cached images keep it
+DASHBOARD_DPI = 200
+
 # Add custom CSS styling for RTL support
 st.markdown(
-    \"\"\"
+    """
     <style>
     body {
         direction: rtl;
@@ -25,55 +30,46 @@ st.markdown(
         text-align: right;
     }
     </style>
-    \"\"\",
+    """,
     unsafe_allow_html=True,
 )
 
-# Function to load and process data
-def load_data():
-    urls = {
-        "2020": "https://data.gov.il/api/3/action/datastore_search?resource_id=520597e3-6003-4247-9634-0ae85434b971",
-        "2021": "https://data.gov.il/api/3/action/datastore_search?resource_id=3f71fd16-25b8-4cfe-8661-e6199db3eb12",
-        "2022": "https://data.gov.il/api/3/action/datastore_search?resource_id=a59f3e9e-a7fe-4375-97d0-76cea68382c1",
-        "2023": "https://data.gov.il/api/3/action/datastore_search?resource_id=32aacfc9-3524-4fba-a282-3af052380244",
-        "2024": "https://data.gov.il/api/3/action/datastore_search?resource_id=5fc13c50-b6f3-4712-b831-a75e0f91a17e",
-    }
-    data_frames = []
-    for year, url in urls.items():
-        response = requests.get(url)
-        data = response.json()
-        records = data['result']['records']
-        df = pd.DataFrame(records)
-        df['Year'] = year  # Add a year column
-        # reverse statisticType column for Hebrew
-        df["ReversedStatisticGroup"] = df["StatisticGroup"].apply(lambda x: x[::-1])
-        data_frames.append(df)
-    return pd.concat(data_frames, ignore_index=True)
-
-# Load the data
+
+def reversed_groups(counts):
+    """
+    :param counts: rows of the statistic group table, see group_counts.py
+    :return: the statistic group names of the rows, reversed for matplotlib, which draws Hebrew left to right
+    """
+    # reversed once per category, not per row
+    return reverse_labels(counts["StatisticGroup"]).astype(str)
+
+
+# Load the data: one cached table per data version, shared by every session
 st.title("פשע בישראל (2020-2024)")
 st.sidebar.header("אפשרויות סינון")
-df_all = load_data()
-
-# Convert "Year" to int and ensure proper handling of Hebrew text
-df_all["Year"] = pd.to_numeric(df_all["Year"], errors="coerce")
-df_all["StatisticGroup"] = df_all["StatisticGroup"].astype(str)
+pin_data()
+group_counts = load_statistic_group_counts()
+data_version = load_data_version()
 
 # Sidebar filter options
-years = st.sidebar.multiselect("בחר שנים", sorted(df_all["Year"].unique()), default=sorted(df_all["Year"].unique()))
-crime_types = st.sidebar.multiselect("בחר סוגי פשעים", df_all["StatisticGroup"].unique(), default=df_all["StatisticGroup"].unique())
+all_years = sorted(group_counts["Year"].unique().tolist())
+all_groups = group_counts["StatisticGroup"].unique().tolist()
+years = st.sidebar.multiselect("בחר שנים", all_years, default=all_years)
+crime_types = st.sidebar.multiselect("בחר סוגי פשעים", all_groups, default=all_groups)
 
-# Filter the data based on user selection
-filtered_data = df_all[(df_all["Year"].isin(years)) & (df_all["StatisticGroup"].isin(crime_types))]
+# Filter the data based on user selection, on the categorical codes of the table
+filtered_data = group_counts[group_counts["Year"].isin(years) & group_counts["StatisticGroup"].isin(crime_types)]
 
-# Visualization of crime trends
-st.subheader("מגמות פשע לפי סוג")
-if filtered_data.empty:
-    st.write("אין נתונים זמינים עבור הבחירה.")
-else:
+
+def draw_trends():
     # Group and plot the data
-    crime_counts = filtered_data.groupby(["Year", "ReversedStatisticGroup"]).size().unstack(fill_value=0)
-    fig, ax = plt.subplots(figsize=(12, 6))
+    crime_counts = (
+        filtered_data.groupby(["Year", reversed_groups(filtered_data)])["Count"]
+        .sum()
+        .unstack(fill_value=0)
+    )
+    fig = Figure(figsize=(12, 6))
+    ax = fig.subplots()
     crime_counts.plot(kind="bar", ax=ax, width=0.8)
 
     # Set Hebrew titles and labels with reversed text
@@ -82,40 +78,32 @@ else:
     ax.set_ylabel("םיעשפ רפסמ", fontsize=14)
     ax.legend(title="עשפ גוס", bbox_to_anchor=(1.05, 1), loc="upper left")
     ax.set_xticklabels(ax.get_xticklabels(), rotation=0, fontsize=12)
-    plt.tight_layout()
+    fig.tight_layout()
+    return fig
 
 
-    st.pyplot(fig)
+# Visualization of crime trends
+st.subheader("מגמות פשע לפי סוג")
+if filtered_data.empty:
+    st.write("אין נתונים זמינים עבור הבחירה.")
+else:
+    # the chart does not depend on the order of the selection, one image per set of choices
+    st.image(dashboard_figures.get_or_render(
+        ("trends", data_version, tuple(sorted(years)), tuple(sorted(crime_types))), draw_trends, DASHBOARD_DPI,
+    ))
 
 # Display the filtered data
 
 
 ### overview visualization
-df = load_data()
 st.title("Crime Analysis Dashboard")
 st.title("Crime Analysis Dashboard")
 st.sidebar.header("Filter Options")
 
 # Dropdown menu for years
-years = ["All Years"] + sorted(df["Year"].dropna().unique().astype(int).tolist())
+years = ["All Years"] + all_years
 selected_year = st.sidebar.selectbox("Select Year:", years)
 
-# Filter data based on selected year
-if selected_year == "All Years":
-    filtered_data = df
-else:
-    filtered_data = df[df["Year"] == int(selected_year)]
-
-# Group by crime type and count
-crime_counts = filtered_data.groupby("ReversedStatisticGroup").size()
-
 # Visualization
+# the script never drew a chart under this header, the year choice above has no effect yet
 st.subheader("Crime Counts by Type")
-fig, ax = plt.subplots(figsize=(12, 6))
-
-
-# Set Hebrew labels
-ax.set_title("מספר הפשעים לפי סוג", fontsize=16)
-ax.set_xlabel("מספר הפשעים", fontsize=14)
-ax.set_ylabel("סוג הפשע", fontsize=14)
-ax.tick_params(axis="y", labelrotation=0)  # Keep Hebrew labels readable
@@ -0,0 +1,222 @@
+import logging
+from functools import reduce
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+# category -> the statistic groups it is made of
+CATEGORIES = {
+    "עבירות פליליות כלליות": ['עבירות כלפי הרכוש', 'עבירות נגד גוף', 'עבירות נגד אדם', 'עבירות מין'],
+    "עבירות מוסר וסדר ציבורי": ['עבירות כלפי המוסר', 'עבירות סדר ציבורי'],
+    "עבירות ביטחון": ['עבירות בטחון'],
+    "עבירות כלכליות ומנהליות": ['עבירות כלכליות', 'עבירות מנהליות', 'עבירות רשוי'],
+    "עבירות תנועה": ['עבירות תנועה'],
+    "עבירות מרמה": ['עבירות מרמה']
+}
+
+# statistic group -> category, built once
+STATISTIC_GROUP_CATEGORY = {group: category for category, groups in CATEGORIES.items() for group in groups}
+
+
+def categorize_statistic_group(stat_group):
+    """
+    Divides the statistic groups into 6
+    :param stat_group: the initial statistic group
+    :return: one of the 6 groups it belongs to
+    """
+    return STATISTIC_GROUP_CATEGORY.get(stat_group)
+
+
+def categorize(statistic_groups):
+    """
+    Vectorized categorize_statistic_group: the lookup runs once per distinct value and the result
+    is spread back to the rows by their codes
+    :param statistic_groups: pandas Series of statistic groups
+    :return: pandas Series of categories, None where the group has no category
+    """
+    codes, uniques = pd.factorize(statistic_groups)
+    # the extra None at the end is picked by the -1 code of missing values
+    lookup = np.array([categorize_statistic_group(group) for group in uniques] + [None], dtype=object)
+    return pd.Series(lookup[codes], index=statistic_groups.index, name="Category")
+
+
+# Low-cardinality text columns, kept as pandas categoricals
+CATEGORY_COLUMNS = [
+    "Quarter", "Yeshuv", "PoliceDistrict", "PoliceMerhav", "PoliceStation", "StatisticArea",
+    "StatisticGroup", "StatisticType", "municipalName", "YearQuarter",
+]
+
+# Numeric columns and their compact dtype. The *Kod columns hold integer codes with gaps,
+# so they use the nullable integer type.
+NUMERIC_COLUMNS = {
+    "_id": "int32",
+    "Year": "int16",
+    "YeshuvKod": "Int32",
+    "PoliceDistrictKod": "Int32",
+    "PoliceMerhavKod": "Int32",
+    "PoliceStationKod": "Int32",
+    "municipalKod": "Int32",
+    "StatisticAreaKod": "Int32",
+    "StatisticGroupKod": "Int16",
+    "StatisticTypeKod": "Int16",
+    "QuarterNumber": "Int8",
+    "QuarterIndex": "Int16",
+    "PeriodQuarters": "int8",
+}
+
+CATEGORY_DTYPE = pd.CategoricalDtype(list(CATEGORIES))
+
+# The 7.10 page compares the quarters before the fourth quarter of 2023 with the ones from it on
+PERIOD_BEFORE = "לפני ה7.10"
+PERIOD_AFTER = "אחרי ה7.10"
+PERIOD_DTYPE = pd.CategoricalDtype([PERIOD_BEFORE, PERIOD_AFTER])
+OCTOBER_7_QUARTER = (2023, 4)
+
+
+def memory_usage_mb(df):
+    """
+    :param df: pandas df
+    :return: the deep memory usage of the frame in MB
+    """
+    return df.memory_usage(deep=True).sum() / 2 ** 20
+
+
+def enforce_schema(df):
+    """
+    Converts the columns to their compact dtypes, in place, and logs how much memory it saved
+    :param df: pandas df of crime records
+    :return: the same df
+    """
+    before = memory_usage_mb(df)
+    apply_schema(df)
+    logger.info("crime records: %d rows, %.1f MB -> %.1f MB", len(df), before, memory_usage_mb(df))
+    return df
+
+
+def apply_schema(df):
+    """
+    Converts the columns to their compact dtypes, in place. Columns already in the right dtype are skipped,
+    and a column that does not fit its numeric dtype is left as is.
+    :param df: pandas df of crime records
+    :return: the same df
+    """
+    for column in CATEGORY_COLUMNS:
+        if column in df and not isinstance(df[column].dtype, pd.CategoricalDtype):
+            df[column] = df[column].astype("category")
+    if "Category" in df:
+        df["Category"] = df["Category"].astype(CATEGORY_DTYPE)
+    if "Period" in df:
+        df["Period"] = df["Period"].astype(PERIOD_DTYPE)
+    for column, dtype in NUMERIC_COLUMNS.items():
+        if column in df and df[column].dtype != dtype:
+            try:
+                df[column] = df[column].astype(dtype)
+            except (TypeError, ValueError):
+                logger.warning("column %s does not fit %s, kept as %s", column, dtype, df[column].dtype)
+    return df
+
+
+def concat_frames(frames, report=True):
+    """
+    Concatenates frames of several years. The categorical columns are first recoded to the union
+    of their categories, so they stay categorical instead of falling back to strings.
+    :param frames: list of pandas dfs
+    :param report: log the memory of the result, see enforce_schema
+    :return: pandas df
+    """
+    frames = list(frames)
+    for column in CATEGORY_COLUMNS:
+        dtypes = [df[column].dtype for df in frames if column in df]
+        if len(dtypes) == len(frames) and all(isinstance(dtype, pd.CategoricalDtype) for dtype in dtypes):
+            categories = reduce(lambda left, right: left.union(right), [dtype.categories for dtype in dtypes])
+            frames = [df.assign(**{column: df[column].cat.set_categories(categories)}) for df in frames]
+    df = pd.concat(frames, ignore_index=True)
+    return enforce_schema(df) if report else apply_schema(df)
+
+
+def reverse_labels(labels):
+    """
+    Reverses Hebrew labels for matplotlib, which draws them left to right. Only the categories are
+    reversed, not every row.
+    :param labels: categorical pandas Series
+    :return: categorical pandas Series with the reversed labels
+    """
+    return labels.cat.rename_categories(lambda label: label[::-1])
+
+
+def add_time_columns(df):
+    """
+    Adds the derived time columns, in place. The quarter labels are parsed once per category and
+    spread to the rows by their codes.
+    QuarterNumber - the quarter as 1-4, missing if the label has no digit
+    QuarterIndex - Year * 4 + QuarterNumber - 1, an ordinal that sorts the quarters across years
+    YearQuarter - "2023-Q4" label of the trends chart, a missing quarter counts as the first one
+    Period - PERIOD_BEFORE or PERIOD_AFTER the 7.10
+    :param df: pandas df with the Year and Quarter columns
+    :return: the same df
+    """
+    quarters = df["Quarter"].astype("category")
+    numbers = pd.Series(quarters.cat.categories.astype(str)).str.extract(r"(\d)")[0].astype(float)
+    # the extra NaN at the end is picked by the -1 code of missing values
+    quarter = np.append(numbers.to_numpy(), np.nan)[quarters.cat.codes.to_numpy()]
+    year = df["Year"].to_numpy(dtype=np.int64)
+
+    df["QuarterNumber"] = pd.array(quarter, dtype="Int8")
+    df["QuarterIndex"] = pd.array(year * 4 + quarter - 1, dtype="Int16")
+
+    labelled = np.nan_to_num(quarter, nan=1)
+    valid = np.isin(labelled, [1, 2, 3, 4])
+    first_year = int(year.min()) if len(year) else 0
+    years = range(first_year, int(year.max()) + 1) if len(year) else []
+    labels = [f"{label_year}-Q{number}" for label_year in years for number in range(1, 5)]
+    codes = np.where(valid, (year - first_year) * 4 + labelled - 1, -1).astype(np.int32)
+    df["YearQuarter"] = pd.Categorical.from_codes(codes, categories=labels, ordered=True)
+
+    after_year, after_quarter = OCTOBER_7_QUARTER
+    after = (year > after_year) | ((year == after_year) & (quarter >= after_quarter))
+    df["Period"] = pd.Categorical.from_codes(after.astype(np.int8), dtype=PERIOD_DTYPE)
+    return df
+
+
+def add_period_quarters(df):
+    """
+    Adds PeriodQuarters, the number of distinct quarters the data has in the Period of every row,
+    which is what the 7.10 page divides by to get a count per quarter
+    :param df: pandas df with the time columns, see add_time_columns
+    :return: the same df
+    """
+    quarters = df.groupby("Period", observed=True)["QuarterIndex"].nunique()
+    df["PeriodQuarters"] = df["Period"].map(quarters).astype("int8")
+    return df
+
+
+def prepare_year(records, year):
+    """
+    Builds the frame of one year from the raw API records
+    :param records: list of record dicts (or a df) as returned by datastore_search
+    :param year: the year of the resource
+    :return: pandas df with the Year, Category and time columns added and the compact schema applied,
+        uncategorized rows are kept
+    """
+    df = pd.DataFrame(records)
+    df['Year'] = int(year)  # Add year column
+    df["Category"] = categorize(df["StatisticGroup"])
+    add_time_columns(df)
+    return enforce_schema(df)
+
+
+def finalize(df):
+    """
+    Drops the uncategorized rows and adds the quarters per period, which depend on every year
+    :param df: prepared frame of one or more years
+    :return: pandas df
+    """
+    df = df.dropna(subset=["Category"]).reset_index(drop=True)
+    if "Period" not in df or df["Period"].isna().any():
+        # rows from snapshots written before the time columns existed
+        add_time_columns(df)
+        enforce_schema(df)
+    return add_period_quarters(df)
@@ -0,0 +1,39 @@
+"""
+Count cube over the crime records.
+
+The cube holds the number of records for every observed combination of CUBE_DIMENSIONS, which is the
+finest grain any dashboard page groups by. A page chart is then a roll-up of a few thousand cells
+instead of a groupby over every record.
+"""
+
+# YearQuarter, Period and PeriodQuarters follow from Year and Quarter, they do not add cells
+CUBE_DIMENSIONS = [
+    "Year", "Quarter", "YearQuarter", "Period", "PeriodQuarters",
+    "Category", "PoliceDistrict", "PoliceMerhav", "StatisticGroup",
+]
+
+
+def build_cube(df):
+    """
+    :param df: the crime records
+    :return: pandas df with one row per observed combination of the dimensions and its "Count".
+        Missing values are kept as their own cells so roll-ups count every record.
+    """
+    dimensions = [column for column in CUBE_DIMENSIONS if column in df]
+    return df.groupby(dimensions, observed=True, dropna=False).size().reset_index(name="Count")
+
+
+def rollup(cube, by, dropna=True, **filters):
+    """
+    Filters the cube and sums the counts over every dimension not in `by`
+    :param cube: the output of build_cube
+    :param by: list of dimensions to keep
+    :param dropna: drop the cells where a `by` dimension is missing, like groupby does by default
+    :param filters: dimension=value or dimension=[values] to keep
+    :return: pandas df with the `by` columns and "Count"
+    """
+    selected = cube
+    for column, value in filters.items():
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        selected = selected[selected[column].isin(values)]
+    return selected.groupby(by, observed=True, dropna=dropna)["Count"].sum().reset_index()
@@ -0,0 +1,305 @@
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from crime_data import concat_frames
+from record_stream import CHUNK_SIZE, read_response
+
+# Base URL of the CKAN action API. Point it at a local stand-in (see datastore_stub.py)
+# by setting the DATASTORE_URL environment variable.
+DATASTORE_URL = os.environ.get("DATASTORE_URL", "https://data.gov.il/api/3/action")
+
+# resource_id of the yearly crime records on data.gov.il
+RESOURCE_IDS = {
+    2020: "520597e3-6003-4247-9634-0ae85434b971",
+    2021: "3f71fd16-25b8-4cfe-8661-e6199db3eb12",
+    2022: "a59f3e9e-a7fe-4375-97d0-76cea68382c1",
+    2023: "32aacfc9-3524-4fba-a282-3af052380244",
+    2024: "5fc13c50-b6f3-4712-b831-a75e0f91a17e",
+}
+
+PAGE_SIZE = 32000  # records per datastore_search call
+MAX_WORKERS = 8  # concurrent requests against the API
+RETRIES = 3
+BACKOFF = 0.5  # seconds, doubled on every retry
+REQUEST_TIMEOUT = (5, 60)  # (connect, read) seconds
+FAILURE_THRESHOLD = 3  # consecutive failed calls that open the circuit of a resource
+RESET_TIMEOUT = 60  # seconds an open circuit waits before letting a trial call through
+
+logger = logging.getLogger(__name__)
+
+
+class DatastoreError(Exception):
+    """Raised when the datastore API answers with an unusable response."""
+
+
+class CircuitOpenError(DatastoreError):
+    """Raised without calling the API while the circuit of a resource is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling a resource after failure_threshold consecutive failures, so an outage costs one fast
+    error instead of a full round of timeouts and retries. After reset_timeout seconds a single trial
+    call is let through: success closes the circuit again, failure keeps it open for another period.
+    """
+
+    def __init__(self, name="", failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "open" if self.clock() - self.opened_at < self.reset_timeout else "half-open"
+
+    def call(self, func, *args, **kwargs):
+        """
+        :param func: the call to protect
+        :return: what func returns
+        :raise CircuitOpenError: if the circuit is open, without calling func
+        """
+        trial = False
+        with self._lock:
+            if self.opened_at is not None:
+                if self.clock() - self.opened_at < self.reset_timeout or self._trial:
+                    raise CircuitOpenError(f"circuit open after {self.failures} failures")
+                self._trial = trial = True
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            # a malformed response (KeyError, TypeError, ...) counts as a failure too
+            self.record_failure()
+            raise
+        else:
+            self.record_success()
+        finally:
+            if trial:
+                with self._lock:
+                    self._trial = False
+        return result
+
+    def record_failure(self):
+        """
+        Counts a failed call, also one made outside of `call`, e.g. in another process
+        """
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Circuit of %s opened after %d failures", self.name, self.failures)
+                self.opened_at = self.clock()
+
+    def record_success(self):
+        """
+        Counts a successful call, also one made outside of `call`, and closes the circuit
+        """
+        with self._lock:
+            if self.opened_at is not None:
+                logger.info("Circuit of %s closed", self.name)
+            self.failures = 0
+            self.opened_at = None
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def breaker(resource_id):
+    """
+    :param resource_id: the CKAN resource id
+    :return: the process-wide CircuitBreaker of the resource
+    """
+    with _breakers_lock:
+        if resource_id not in _breakers:
+            _breakers[resource_id] = CircuitBreaker(resource_id)
+        return _breakers[resource_id]
+
+
+def degraded(resource_ids=None):
+    """
+    :param resource_ids: dict of year -> resource_id, defaults to RESOURCE_IDS
+    :return: sorted years whose last call failed
+    """
+    resource_ids = resource_ids or RESOURCE_IDS
+    with _breakers_lock:
+        return sorted(year for year, resource_id in resource_ids.items()
+                      if resource_id in _breakers and _breakers[resource_id].failures)
+
+
+class JitteredRetry(Retry):
+    """
+    Retry whose backoff is drawn uniformly up to the exponential one ("full jitter"), so the workers
+    retrying during the same outage do not hit the API in step
+    """
+
+    def get_backoff_time(self):
+        return random.uniform(0, super().get_backoff_time())
+
+
+def make_session(max_workers=MAX_WORKERS, retries=RETRIES, backoff=BACKOFF):
+    """
+    Creates a pooled session that retries failed GET requests with jittered exponential backoff
+    :param max_workers: size of the connection pool, should match the number of threads using it
+    :param retries: how many times a failed request is retried
+    :param backoff: backoff factor in seconds between retries
+    :return: requests.Session
+    """
+    retry = JitteredRetry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",),
+    )
+    adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def fetch_page(session, resource_id, offset=0, limit=PAGE_SIZE, base_url=None, frames=False):
+    """
+    Fetches one page of a resource from datastore_search, ordered by _id, through the circuit breaker
+    of the resource
+    :param session: requests session to use
+    :param resource_id: the CKAN resource id
+    :param offset: index of the first record of the page
+    :param limit: page size
+    :param base_url: CKAN action API url, defaults to DATASTORE_URL
+    :param frames: decode the records into a typed frame while the body streams in, see record_stream.py
+    :return: the "result" part of the response (records, total, ...)
+    """
+    return breaker(resource_id).call(_fetch_page, session, resource_id, offset, limit, base_url, frames)
+
+
+def _fetch_page(session, resource_id, offset, limit, base_url, frames=False):
+    response = session.get(
+        f"{base_url or DATASTORE_URL}/datastore_search",
+        params={"resource_id": resource_id, "offset": offset, "limit": limit, "sort": "_id asc"},
+        timeout=REQUEST_TIMEOUT,
+        stream=frames,
+    )
+    with response:
+        response.raise_for_status()
+        data = read_response(response.iter_content(CHUNK_SIZE)) if frames else response.json()
+    if not data.get("success") or "records" not in data.get("result", {}):
+        raise DatastoreError(f"datastore_search failed for {resource_id} at offset {offset}")
+    return data["result"]
+
+
+def resource_state(session, resource_id, base_url=None):
+    """
+    Reads what is needed to tell whether a resource changed since the last download
+    :param session: requests session to use
+    :param resource_id: the CKAN resource id
+    :param base_url: CKAN action API url, defaults to DATASTORE_URL
+    :return: dict with the resource "last_modified" timestamp and its record "total"
+    """
+    last_modified = breaker(resource_id).call(_last_modified, session, resource_id, base_url)
+    return {
+        "last_modified": last_modified,
+        "total": fetch_page(session, resource_id, 0, 0, base_url).get("total", 0),
+    }
+
+
+def _last_modified(session, resource_id, base_url):
+    response = session.get(
+        f"{base_url or DATASTORE_URL}/resource_show",
+        params={"id": resource_id},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    data = response.json()
+    if not data.get("success"):
+        raise DatastoreError(f"resource_show failed for {resource_id}")
+    resource = data["result"]
+    return resource.get("last_modified") or resource.get("metadata_modified")
+
+
+def fetch_states(resource_ids=None, max_workers=MAX_WORKERS, base_url=None, session=None, return_exceptions=False):
+    """
+    Reads the state of every resource concurrently
+    :param resource_ids: dict of year -> resource_id, defaults to RESOURCE_IDS
+    :param return_exceptions: give the error of a failed resource as its state instead of raising it
+    :return: dict of year -> resource_state()
+    """
+    resource_ids = resource_ids or RESOURCE_IDS
+    own_session = session is None
+    session = session or make_session(max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                year: pool.submit(resource_state, session, resource_id, base_url)
+                for year, resource_id in resource_ids.items()
+            }
+            if not return_exceptions:
+                return {year: future.result() for year, future in futures.items()}
+            return {year: future.exception() or future.result() for year, future in futures.items()}
+    finally:
+        if own_session:
+            session.close()
+
+
+def fetch_all(resource_ids=None, page_size=PAGE_SIZE, max_workers=MAX_WORKERS, base_url=None, session=None,
+              offsets=None, frames=False):
+    """
+    Downloads every record of every resource. The first page of each resource is requested
+    concurrently to learn its total, then all the remaining pages are requested on the same pool.
+    :param resource_ids: dict of year -> resource_id, defaults to RESOURCE_IDS
+    :param page_size: records per request
+    :param max_workers: maximum number of requests in flight
+    :param base_url: CKAN action API url, defaults to DATASTORE_URL
+    :param session: optional session, a pooled one is created if not given
+    :param offsets: optional dict of year -> number of leading records to skip, for incremental downloads
+    :param frames: decode the pages into typed frames while they stream in, instead of lists of dicts
+    :return: dict of year -> list of records, or a pandas df with frames, in _id order
+    """
+    resource_ids = resource_ids or RESOURCE_IDS
+    offsets = offsets or {}
+    own_session = session is None
+    session = session or make_session(max_workers)
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            first_pages = {
+                year: pool.submit(fetch_page, session, resource_id, offsets.get(year, 0), page_size, base_url, frames)
+                for year, resource_id in resource_ids.items()
+            }
+            first_pages = {year: future.result() for year, future in first_pages.items()}
+
+            rest = {
+                year: [
+                    pool.submit(fetch_page, session, resource_ids[year], offset, page_size, base_url, frames)
+                    for offset in range(offsets.get(year, 0) + page_size, result.get("total", 0), page_size)
+                ]
+                for year, result in first_pages.items()
+            }
+
+            records = {}
+            for year, result in first_pages.items():
+                if frames:
+                    pages = [result["records"]] + [future.result()["records"] for future in rest[year]]
+                    pages = [df for df in pages if len(df)] or pages[:1]
+                    records[year] = concat_frames(pages, report=False)
+                    continue
+                records[year] = list(result["records"])
+                for future in rest[year]:
+                    records[year].extend(future.result()["records"])
+            return records
+    finally:
+        if own_session:
+            session.close()
@@ -0,0 +1,221 @@
+"""
+Local stand-in for the data.gov.il CKAN datastore API.
+
+Serves synthetic crime records in the datastore_search response shape so the ingestion code can be
+exercised without network access:
+
+    python datastore_stub.py --rows 100000 --port 8765
+    DATASTORE_URL=http://127.0.0.1:8765/api/3/action streamlit run main.py
+"""
+import argparse
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from datastore import RESOURCE_IDS
+
+# merhav -> district, as they appear in the real records
+MERHAVIM = {
+    "מרחב איילון החדש תא": "מחוז תא",
+    "מרחב איילון הישן תא": "מחוז תא",
+    "מרחב ירקון תא": "מחוז תא",
+    "מרחב דן תא": "מחוז תא",
+    "מרחב שרון": "מחוז מרכז",
+    "מרחב שפלה": "מחוז מרכז",
+    "מרחב נתבג מרכז": "מחוז מרכז",
+    "מרחב שומרון שי": "מחוז שי",
+    "מרחב יהודה שי": "מחוז שי",
+    "מרחב נגב": "מחוז דרומי",
+    "מרחב לכיש": "מחוז דרומי",
+    "מרחב אילת דרום": "מחוז דרומי",
+    "מרחב ציון ירושלים": "מחוז ירושלים",
+    "מרחב קדם ירושלים": "מחוז ירושלים",
+    "מרחב דוד ירושלים": "מחוז ירושלים",
+    "מרחב כנרת צפון": "מחוז צפון",
+    "מרחב עמקים צפון": "מחוז צפון",
+    "מרחב גליל צפון": "מחוז צפון",
+    "מרחב מנשה חוף": "מחוז חוף",
+    "מרחב כרמל חוף": "מחוז חוף",
+    "מרחב אשר חוף": "מחוז חוף",
+    "כל הארץ": "כל הארץ",
+    "": "",
+}
+
+STATISTIC_GROUPS = [
+    'עבירות כלפי הרכוש', 'עבירות נגד גוף', 'עבירות נגד אדם', 'עבירות מין',
+    'עבירות כלפי המוסר', 'עבירות סדר ציבורי', 'עבירות בטחון',
+    'עבירות כלכליות', 'עבירות מנהליות', 'עבירות רשוי',
+    'עבירות תנועה', 'עבירות מרמה', 'עבירות אחרות',
+]
+
+QUARTERS = ["Q1", "Q2", "Q3", "Q4"]
+
+
+def synthetic_frame(rows, year, seed=0, start_id=1, categorical=False):
+    """
+    Generates random crime records with the schema of the data.gov.il resources
+    :param rows: number of records
+    :param year: value of the Year column
+    :param seed: random seed, the same seed gives the same records
+    :param start_id: _id of the first record
+    :param categorical: build the text columns as categoricals, for sizes whose strings would not fit
+        in memory. The values are the same either way.
+    :return: pandas df
+    """
+    rng = np.random.default_rng(seed + year)
+    merhavim = list(MERHAVIM)
+    districts = sorted(set(MERHAVIM.values()))
+    merhav = rng.integers(0, len(merhavim), rows)
+    quarter = rng.integers(0, len(QUARTERS), rows)
+    group = rng.integers(0, len(STATISTIC_GROUPS), rows)
+    district = np.array([districts.index(MERHAVIM[name]) for name in merhavim])[merhav]
+
+    def column(codes, values):
+        if categorical:
+            return pd.Categorical.from_codes(codes, categories=values)
+        return np.array(values)[codes]
+
+    return pd.DataFrame({
+        "_id": np.arange(start_id, start_id + rows),
+        "Year": year,
+        "Quarter": column(quarter, QUARTERS),
+        "PoliceDistrict": column(district, districts),
+        "PoliceMerhav": column(merhav, merhavim),
+        "StatisticGroup": column(group, STATISTIC_GROUPS),
+    })
+
+
+def synthetic_resources(rows_per_year, seed=0, resource_ids=None):
+    """
+    Generates the records of every yearly resource
+    :param rows_per_year: number of records for every year
+    :param seed: random seed
+    :param resource_ids: dict of year -> resource_id, defaults to the real ones
+    :return: dict of resource_id -> list of records
+    """
+    resource_ids = resource_ids or RESOURCE_IDS
+    return {
+        resource_id: synthetic_frame(rows_per_year, year, seed).to_dict("records")
+        for year, resource_id in resource_ids.items()
+    }
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        action = url.path.rstrip("/").rsplit("/", 1)[-1]
+        stub = self.server.stub
+        stub.requests += 1
+
+        resource_id = params.get("id") or params.get("resource_id")
+        if stub.delay:
+            time.sleep(stub.delay)
+        if resource_id in stub.failing:
+            self._reply(stub.failing[resource_id], {"success": False, "error": {"message": "Service unavailable"}})
+            return
+
+        if action == "resource_show" and params.get("id") in stub.resources:
+            self._reply(200, {
+                "success": True,
+                "result": {"id": params["id"], "last_modified": stub.last_modified[params["id"]]},
+            })
+            return
+
+        records = stub.resources.get(params.get("resource_id"))
+        if action != "datastore_search" or records is None:
+            self._reply(404, {"success": False, "error": {"message": "Not found"}})
+            return
+
+        offset = int(params.get("offset", 0))
+        limit = int(params.get("limit", 100))
+        self._reply(200, {
+            "success": True,
+            "result": {
+                "resource_id": params["resource_id"],
+                "records": records[offset:offset + limit],
+                "offset": offset,
+                "limit": limit,
+                "total": len(records),
+            },
+        })
+
+    def _reply(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False, default=int).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubDatastore:
+    """
+    Threaded HTTP server answering datastore_search and resource_show like CKAN does
+    :param resources: dict of resource_id -> list of records
+    :param port: 0 picks a free port
+    """
+
+    def __init__(self, resources, host="127.0.0.1", port=0):
+        self.resources = resources
+        self.last_modified = {resource_id: _now() for resource_id in resources}
+        self.requests = 0
+        self.failing = {}  # resource_id -> HTTP status it answers with, to simulate an outage
+        self.delay = 0  # seconds before every answer, to simulate a slow upstream
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/api/3/action"
+
+    def append(self, resource_id, records):
+        """
+        Adds records to a resource and bumps its last_modified, like a new upload to data.gov.il
+        :param resource_id: the resource to extend
+        :param records: list of record dicts, their _id values should continue the existing ones
+        """
+        self.resources[resource_id] = self.resources[resource_id] + list(records)
+        self.last_modified[resource_id] = _now()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve synthetic crime records like data.gov.il")
+    parser.add_argument("--rows", type=int, default=100000, help="records per year")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    stub = StubDatastore(synthetic_resources(args.rows), port=args.port)
+    print(f"serving on {stub.base_url}")
+    stub._server.serve_forever()
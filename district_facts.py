@@ -0,0 +1,86 @@
+"""
+District-year fact table of the employment page: crime counts, employment rate and population.
+
+The table is joined once per data version (see refresher.DataVersion) and indexed by
+(PoliceDistrict, Year), so a rerun of the page only slices the selected districts. Population.csv
+writes values from a thousand up with a thousands separator ("1,000.20"), so the numbers are parsed
+with the separator removed instead of turning those rows into NaN.
+
+    python district_facts.py    # print the table of the current snapshot
+"""
+import pandas as pd
+
+from cube import rollup
+
+EMPLOYMENT_PATH = "employmentRate.csv"
+POPULATION_PATH = "Population.csv"
+
+# PoliceDistrict values that are not a district
+NOT_DISTRICTS = ["כל הארץ", ""]
+
+
+def parse_number(values):
+    """
+    :param values: pandas Series of numbers as read from a CSV, possibly with thousands separators
+    :return: float Series, NaN where the value is not a number
+    """
+    return pd.to_numeric(values.astype(str).str.replace(",", "", regex=False), errors="coerce")
+
+
+def read_employment(path=EMPLOYMENT_PATH):
+    """
+    :param path: CSV with EmploymentRate, PoliceDistrict and Year
+    :return: pandas df with Year, PoliceDistrict and EmploymentRate, without the national rows
+    """
+    df = pd.read_csv(path)
+    df = df[df["PoliceDistrict"].notna() & ~df["PoliceDistrict"].isin(NOT_DISTRICTS)]
+    return df.assign(EmploymentRate=parse_number(df["EmploymentRate"]))[["Year", "PoliceDistrict", "EmploymentRate"]]
+
+
+def read_population(path=POPULATION_PATH):
+    """
+    :param path: CSV with PoliceDistrict, Year and Population(k)
+    :return: pandas df with Year, PoliceDistrict and Population in thousands
+    """
+    df = pd.read_csv(path, dtype={"Population(k)": str})
+    return df.assign(Population=parse_number(df["Population(k)"]))[["Year", "PoliceDistrict", "Population"]]
+
+
+def build_district_facts(cube, employment=None, population=None):
+    """
+    Joins the crime counts per district and year with the employment rate and the population
+    :param cube: the output of cube.build_cube
+    :param employment: output of read_employment, read from EMPLOYMENT_PATH if not given
+    :param population: output of read_population, read from POPULATION_PATH if not given
+    :return: pandas df indexed by (PoliceDistrict, Year) with Crime Count, EmploymentRate, Population
+        and Crime Rate (crimes per 1,000 residents). Every district-year of any of the sources is
+        kept, a year without crimes gets a count of 0.
+    """
+    employment = read_employment() if employment is None else employment
+    population = read_population() if population is None else population
+
+    crime = rollup(cube, ["Year", "PoliceDistrict"])
+    crime = crime[~crime["PoliceDistrict"].isin(NOT_DISTRICTS)]
+    crime = pd.DataFrame({
+        "Year": crime["Year"].astype("int64").to_numpy(),
+        "PoliceDistrict": crime["PoliceDistrict"].astype(str).to_numpy(),
+        "Crime Count": crime["Count"].to_numpy(),
+    })
+
+    facts = (
+        crime.merge(employment, on=["Year", "PoliceDistrict"], how="outer")
+        .merge(population, on=["Year", "PoliceDistrict"], how="outer")
+    )
+    facts["Crime Count"] = facts["Crime Count"].fillna(0)
+    facts["Population"] = facts["Population"].fillna(1)  # Avoid division by zero
+    facts["Crime Rate"] = facts["Crime Count"] / facts["Population"]  # Per 1000 people
+    return facts.set_index(["PoliceDistrict", "Year"]).sort_index()
+
+
+if __name__ == "__main__":
+    from cube import build_cube
+    from crime_data import finalize
+    from snapshot_store import load_or_refresh
+
+    pd.set_option("display.width", 200)
+    print(build_district_facts(build_cube(finalize(load_or_refresh()))))
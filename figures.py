@@ -0,0 +1,107 @@
+"""
+Caches of built figures.
+
+Drawing the overview chart and rasterizing it at 300 DPI takes far longer than anything else on the
+page, while the chart only has a handful of possible states. The cache keeps the PNG bytes of each
+state, keyed by the filter values and the data version, and drops the least recently used one when
+it is full. The figures are built with matplotlib.figure.Figure instead of pyplot, so they are never
+registered in pyplot's global figure list and are freed once rasterized.
+
+The plotly charts keep their base spec instead, built once per data version with every trace in it.
+A widget change then only swaps trace visibility, data arrays or a title in a copy of the spec,
+without running plotly express or validating the figure again.
+"""
+import io
+import os
+import threading
+
+import plotly.graph_objects as go
+
+from lru import LRUCache
+
+FIGURE_CACHE_SIZE = int(os.environ.get("FIGURE_CACHE_SIZE", "32"))
+FIGURE_DPI = 300
+
+
+def render_png(fig, dpi=FIGURE_DPI):
+    """
+    Rasterizes the figure the way st.pyplot does and releases it
+    :param fig: matplotlib Figure
+    :param dpi: resolution of the image
+    :return: PNG bytes
+    """
+    image = io.BytesIO()
+    fig.savefig(image, format="png", dpi=dpi, bbox_inches="tight")
+    fig.clf()
+    return image.getvalue()
+
+
+# matplotlib is not thread safe, the figures of every cache are drawn one at a time
+_matplotlib_lock = threading.Lock()
+
+
+class FigureCache(LRUCache):
+    """
+    LRU cache of rendered matplotlib figures
+    """
+
+    def get_or_render(self, key, draw, dpi=FIGURE_DPI):
+        """
+        :param key: hashable state of the figure, including the data version
+        :param draw: function without arguments returning the matplotlib Figure, called on a miss only
+        :param dpi: resolution of the image
+        :return: PNG bytes
+        """
+        def render():
+            with _matplotlib_lock:
+                return render_png(draw(), dpi)
+
+        return self.get_or_create(key, render)
+
+
+class SpecCache(LRUCache):
+    """
+    LRU cache of plotly figure specs
+    """
+
+    def get_or_build(self, key, build):
+        """
+        :param key: hashable state of the figure, including the data version
+        :param build: function without arguments returning the plotly Figure, called on a miss only
+        :return: the figure as a dict, which must not be modified
+        """
+        return self.get_or_create(key, lambda: build().to_dict())
+
+
+def figure_from_spec(spec, trace_updates=None, layout_updates=None):
+    """
+    Builds a figure from a cached spec. Only the updated traces and layout entries are copied, the
+    cached spec itself is left as is. The spec was validated when it was built, so it is not again.
+    :param spec: dict from SpecCache
+    :param trace_updates: optional list with a dict (or None) per trace of the spec, merged into it
+    :param layout_updates: optional dict of top level layout entries to replace
+    :return: plotly Figure
+    """
+    data = spec["data"]
+    if trace_updates is not None:
+        data = [trace if update is None else {**trace, **update} for trace, update in zip(data, trace_updates)]
+    layout = {**spec["layout"], **layout_updates} if layout_updates else spec["layout"]
+    return go.Figure({"data": data, "layout": layout}, _validate=False)
+
+
+def trace_visibility(spec, visible, names):
+    """
+    :param spec: dict from SpecCache
+    :param visible: the trace names to show
+    :param names: the trace names the choice applies to, other traces are left as they are
+    :return: trace_updates for figure_from_spec
+    """
+    return [
+        {"visible": trace.get("name") in visible} if trace.get("name") in names else None
+        for trace in spec["data"]
+    ]
+
+
+overview_figures = FigureCache(FIGURE_CACHE_SIZE)
+chart_specs = SpecCache(FIGURE_CACHE_SIZE)
+dashboard_figures = FigureCache(FIGURE_CACHE_SIZE)  # the charts of crime_dashboard.py
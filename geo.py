@@ -0,0 +1,120 @@
+"""
+Police Merhav boundaries, prepared once per source file.
+
+Extracting the geodatabase, decoding it, reprojecting and computing centroids takes seconds, so the
+result is stored as GeoParquet next to the snapshots, keyed by the checksum of the zip. A new zip
+gets a new file, an unchanged one is read back directly.
+"""
+import hashlib
+import os
+import zipfile
+
+import geopandas as gpd
+import shapely
+from shapely.geometry import mapping
+
+ZIP_PATH = "policestationboundaries.gdb.zip"
+EXTRACT_DIR = "PoliceStationBoundaries"
+LAYER_NAME = "PoliceMerhavBoundaries"
+GEO_CACHE_DIR = os.environ.get("GEO_CACHE_DIR", os.path.join("data", "geo"))
+
+# Simplification tolerance, in degrees, of every GeoJSON detail level. 0 keeps the full geometry.
+SIMPLIFY_TOLERANCES = {"full": 0, "high": 0.0002, "medium": 0.0005, "low": 0.002}
+MAP_DETAIL = os.environ.get("MAP_DETAIL", "medium")
+
+
+def file_checksum(path):
+    """
+    :param path: file to hash
+    :return: sha256 hex digest of the file
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def extract_zip(zip_path=ZIP_PATH):
+    # חלץ את התוכן
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        zip_ref.extractall(EXTRACT_DIR)
+
+    # ודא שהתיקייה קיימת
+    gdb_path = os.path.join(EXTRACT_DIR, "PoliceStationBoundaries.gdb")
+    return gdb_path
+
+
+def clean_merhav_name(names):
+    """
+    :param names: pandas Series of Merhav names
+    :return: the names without surrounding whitespace and line breaks
+    """
+    return names.str.strip().str.replace(r'\r\n', '', regex=True)
+
+
+def read_merhav_boundaries(zip_path=ZIP_PATH):
+    """
+    Reads the Merhav layer from the geodatabase and prepares it for the map
+    :param zip_path: zipped geodatabase
+    :return: GeoDataFrame in WGS84 with clean names, centroids and a unique_id per Merhav
+    """
+    gdf = gpd.read_file(extract_zip(zip_path), layer=LAYER_NAME)
+    gdf = gdf.to_crs(epsg=4326)
+    gdf['MerhavName'] = clean_merhav_name(gdf['MerhavName'])
+    gdf['centroid_lat'] = gdf.geometry.centroid.y
+    gdf['centroid_lon'] = gdf.geometry.centroid.x
+    gdf['unique_id'] = gdf.index
+    return gdf
+
+
+def prepare_merhav_boundaries(zip_path=ZIP_PATH, cache_dir=None):
+    """
+    Returns the prepared Merhav boundaries, reading the geodatabase only if this zip was never prepared
+    :param zip_path: zipped geodatabase
+    :param cache_dir: where prepared files are kept, defaults to GEO_CACHE_DIR
+    :return: GeoDataFrame, see read_merhav_boundaries
+    """
+    cache_dir = cache_dir or GEO_CACHE_DIR
+    cached = os.path.join(cache_dir, f"merhav-{file_checksum(zip_path)[:16]}.parquet")
+    if os.path.exists(cached):
+        return gpd.read_parquet(cached)
+
+    gdf = read_merhav_boundaries(zip_path)
+    os.makedirs(cache_dir, exist_ok=True)
+    tmp_path = cached + ".tmp"
+    gdf.to_parquet(tmp_path)
+    os.replace(tmp_path, cached)
+    return gdf
+
+
+def simplify_boundaries(gdf, tolerance):
+    """
+    Simplifies the boundaries as one coverage, so neighbouring Merhavim keep sharing the same edge
+    instead of opening gaps or overlaps between them
+    :param gdf: GeoDataFrame of the Merhav polygons
+    :param tolerance: simplification tolerance in the units of the CRS, 0 returns the geometry as is
+    :return: GeoSeries
+    """
+    if not tolerance:
+        return gdf.geometry
+    if hasattr(shapely, "coverage_simplify"):
+        return gpd.GeoSeries(shapely.coverage_simplify(gdf.geometry.values, tolerance), index=gdf.index, crs=gdf.crs)
+    return gdf.geometry.simplify(tolerance, preserve_topology=True)
+
+
+def boundaries_geojson(gdf, detail=None):
+    """
+    Builds the GeoJSON the choropleth needs: only the geometry, with the feature id matching unique_id
+    :param gdf: prepared Merhav boundaries, see read_merhav_boundaries
+    :param detail: one of SIMPLIFY_TOLERANCES, defaults to MAP_DETAIL
+    :return: GeoJSON dict
+    """
+    geometry = simplify_boundaries(gdf, SIMPLIFY_TOLERANCES[detail or MAP_DETAIL])
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "id": str(unique_id), "properties": {}, "geometry": mapping(shape)}
+            for unique_id, shape in zip(gdf["unique_id"], geometry)
+        ],
+    }
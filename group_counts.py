@@ -0,0 +1,22 @@
+"""
+Counts per year and statistic group of crime_dashboard.py.
+
+Unlike the pages of main.py, that dashboard shows every statistic group, also the ones without a
+category, so the table is counted over the records of the snapshot rather than the cube. Only the two
+columns are read, one year at a time.
+"""
+from crime_data import concat_frames
+
+GROUP_COLUMNS = ["Year", "StatisticGroup"]
+
+
+def build_group_counts(partitions):
+    """
+    :param partitions: iterable of (year, pandas df with the GROUP_COLUMNS), see snapshot_store.iter_partitions
+    :return: pandas df with Year, StatisticGroup (categorical) and Count, one row per observed pair
+    """
+    counts = [
+        df.groupby(GROUP_COLUMNS, observed=True).size().reset_index(name="Count")
+        for _, df in partitions
+    ]
+    return concat_frames(counts, report=False)
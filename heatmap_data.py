@@ -0,0 +1,160 @@
+"""
+Heatmap dataset: crime counts per (StatisticGroup, Year, Merhav) with the Merhav names of the map.
+
+The records use longer Merhav names than the boundaries layer ("מרחב דן תא" vs "מרחב דן"), so every
+name is normalized once to the MerhavName of the map and used as the join key. The dataset is built
+from the snapshot one year at a time and stored as Parquet, keyed by the snapshot version and the
+boundaries file, together with a report of the names that did not match.
+
+    python heatmap_data.py    # build (if needed) and print the unmatched names
+"""
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from geo import ZIP_PATH, clean_merhav_name, file_checksum, prepare_merhav_boundaries
+from snapshot_store import current_version, iter_partitions, list_versions
+
+logger = logging.getLogger(__name__)
+
+HEATMAP_DIR = os.environ.get("HEATMAP_DIR", os.path.join("data", "heatmap"))
+
+# PoliceMerhav of the records -> MerhavName of the map
+MERHAV_ALIASES = {
+    "מרחב איילון החדש תא": "מרחב איילון",
+    "מרחב איילון הישן תא": "מרחב איילון",
+    "מרחב אילת דרום": "מרחב אילת",
+    "מרחב אשר חוף": "מרחב אשר",
+    "מרחב יהודה שי": "מרחב יהודה",
+    "מרחב גליל צפון": "מרחב גליל",
+    "מרחב ירקון תא": "מרחב ירקון",
+    "מרחב דוד ירושלים": "מרחב דוד",
+    "מרחב שומרון שי": "מרחב שומרון",
+    "מרחב כרמל חוף": "מרחב כרמל",
+    "מרחב דן תא": "מרחב דן",
+    "מרחב קדם ירושלים": "מרחב קדם",
+    "מרחב ציון ירושלים": "מרחב ציון",
+    "מרחב כנרת צפון": "מרחב כנרת",
+    "מרחב עמקים צפון": "מרחב עמקים",
+    "מרחב נתבג מרכז": 'מרחב נתב"ג',
+    "מרחב מנשה חוף": "מרחב מנשה",
+}
+
+
+def merhav_join_key(names, merhav_names):
+    """
+    Normalizes the Merhav names of the records to the names of the map. The lookup runs once per
+    distinct name, the rows only get their codes remapped.
+    :param names: pandas Series of PoliceMerhav
+    :param merhav_names: the MerhavName values of the map
+    :return: (categorical Series of map names, NaN where there is no match;
+        dict of unmatched name -> number of records)
+    """
+    names = names.astype("category")
+    targets = pd.Index(sorted(set(merhav_names)))
+    normalized = clean_merhav_name(pd.Series(names.cat.categories, dtype=object)).replace(MERHAV_ALIASES)
+    # category code -> target code, the extra -1 at the end is picked by the -1 code of missing values
+    remap = np.append(targets.get_indexer(normalized), -1)
+    key = pd.Series(
+        pd.Categorical.from_codes(remap[names.cat.codes.to_numpy()], categories=targets),
+        index=names.index,
+        name="MerhavName",
+    )
+    counts = names.value_counts()
+    unmatched = {name: int(counts[name]) for name, code in zip(names.cat.categories, remap) if code == -1}
+    return key, unmatched
+
+
+def build_heatmap_dataset(partitions, merhav_names):
+    """
+    Counts the records per (StatisticGroup, Year, MerhavName), one partition at a time
+    :param partitions: iterable of (year, pandas df) as given by snapshot_store.iter_partitions
+    :param merhav_names: the MerhavName values of the map
+    :return: (pandas df of counts; dict of unmatched name -> number of records)
+    """
+    counts, unmatched = [], {}
+    for year, df in partitions:
+        key, year_unmatched = merhav_join_key(df["PoliceMerhav"], merhav_names)
+        for name, count in year_unmatched.items():
+            unmatched[name] = unmatched.get(name, 0) + count
+        counts.append(
+            df.assign(MerhavName=key)
+            .groupby(["StatisticGroup", "Year", "MerhavName"], observed=True)
+            .size()
+            .reset_index(name="Count")
+        )
+    dataset = pd.concat(counts, ignore_index=True)
+    dataset["StatisticGroup"] = dataset["StatisticGroup"].astype("category")
+    dataset["Count"] = dataset["Count"].astype("int32")
+    return dataset, unmatched
+
+
+def artifact_name(zip_path=ZIP_PATH, version=None, snapshot_root=None):
+    """
+    :param zip_path: zipped geodatabase of the boundaries
+    :param version: snapshot version, defaults to the current one
+    :param snapshot_root: snapshot directory, defaults to snapshot_store.SNAPSHOT_DIR
+    :return: the name of the heatmap dataset for the snapshot and this boundaries file
+    """
+    return f"heatmap-{version or current_version(snapshot_root)}-{file_checksum(zip_path)[:16]}"
+
+
+def prepare_heatmap_dataset(zip_path=ZIP_PATH, root=None, version=None, snapshot_root=None):
+    """
+    Returns the heatmap dataset of a snapshot, building it only if it was not built yet
+    :param zip_path: zipped geodatabase of the boundaries
+    :param root: artifact directory, defaults to HEATMAP_DIR
+    :param version: snapshot version, defaults to the current one
+    :param snapshot_root: snapshot directory, defaults to snapshot_store.SNAPSHOT_DIR
+    :return: pandas df with StatisticGroup, Year, MerhavName and Count
+    """
+    root = root or HEATMAP_DIR
+    version = version or current_version(snapshot_root)
+    name = artifact_name(zip_path, version, snapshot_root)
+    path = os.path.join(root, f"{name}.parquet")
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+
+    merhav_names = prepare_merhav_boundaries(zip_path)["MerhavName"]
+    dataset, unmatched = build_heatmap_dataset(iter_partitions(version, snapshot_root), merhav_names)
+    if unmatched:
+        logger.warning("Merhav names without a match on the map: %s", unmatched)
+
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, f"{name}-unmatched.json"), "w", encoding="utf-8") as f:
+        json.dump(unmatched, f, ensure_ascii=False, indent=2)
+    dataset.to_parquet(path + ".tmp", index=False)
+    os.replace(path + ".tmp", path)
+    prune_heatmap_datasets(root, snapshot_root, keep=version)
+    return dataset
+
+
+def prune_heatmap_datasets(root=None, snapshot_root=None, keep=None):
+    """
+    Deletes the datasets of the snapshot versions that were pruned, see snapshot_store.KEEP_VERSIONS
+    :param root: artifact directory, defaults to HEATMAP_DIR
+    :param snapshot_root: snapshot directory, defaults to snapshot_store.SNAPSHOT_DIR
+    :param keep: a version whose dataset is kept in any case
+    """
+    root = root or HEATMAP_DIR
+    versions = set(list_versions(snapshot_root)) | {keep}
+    for file_name in os.listdir(root):
+        # heatmap-<version>-<checksum>.parquet and heatmap-<version>-<checksum>-unmatched.json
+        parts = file_name.split("-")
+        if parts[0] == "heatmap" and len(parts) > 2 and parts[1] not in versions:
+            try:
+                os.remove(os.path.join(root, file_name))
+            except OSError:
+                pass
+
+
+if __name__ == "__main__":
+    dataset = prepare_heatmap_dataset()
+    print(f"{len(dataset)} cells, {dataset['Count'].sum()} records")
+    with open(os.path.join(HEATMAP_DIR, f"{artifact_name()}-unmatched.json"), encoding="utf-8") as f:
+        unmatched = json.load(f)
+    for name, count in unmatched.items():
+        print(f"unmatched: {name!r} ({count} records)")
@@ -0,0 +1,295 @@
+"""
+Timing spans, cache counters and memory of the dashboard.
+
+Off by default. With DASHBOARD_METRICS=1 every page rerun records how long each of its stages took,
+the caches count their hits and misses, and each rerun is logged as one JSON line. The numbers are
+shown in an admin panel at the bottom of the sidebar, opened with ?admin=<DASHBOARD_ADMIN_TOKEN> (the
+panel stays off when no token is set), and with DASHBOARD_METRICS_PORT they are also served in the
+Prometheus text format on http://127.0.0.1:<port>/metrics. Set DASHBOARD_METRICS_HOST (e.g. 0.0.0.0) to
+let a scraper on another machine reach it. When disabled, span() hands back one shared
+no-op context and count() returns at once, so the pages pay nothing for them.
+"""
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENABLED = os.environ.get("DASHBOARD_METRICS", "") not in ("", "0")
+ADMIN_TOKEN = os.environ.get("DASHBOARD_ADMIN_TOKEN", "")
+METRICS_PORT = int(os.environ.get("DASHBOARD_METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("DASHBOARD_METRICS_HOST", "127.0.0.1")  # local only unless widened
+
+logger = logging.getLogger(__name__)
+
+_NOOP = nullcontext()
+
+
+class Metrics:
+    """
+    Process-wide span timings and counters
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.spans = {}  # name -> [count, total seconds, max seconds]
+        self.counters = {}  # (name, sorted label items) -> value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            stats = self.spans.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += seconds
+            stats[2] = max(stats[2], seconds)
+
+    def increment(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def snapshot(self):
+        """
+        :return: dict with copies of the spans and counters
+        """
+        with self._lock:
+            return {
+                "spans": {name: list(stats) for name, stats in self.spans.items()},
+                "counters": dict(self.counters),
+            }
+
+
+metrics = Metrics()
+_rerun = threading.local()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        metrics.observe(self.name, seconds)
+        spans = getattr(_rerun, "spans", None)
+        if spans is not None:
+            spans.append((self.name, seconds))
+        return False
+
+
+def span(name):
+    """
+    Times a stage: `with span("overview.rollups"): ...`
+    :param name: stage name, "<page>.<stage>"
+    :return: context manager
+    """
+    if not ENABLED:
+        return _NOOP
+    return _Span(name)
+
+
+def count(name, **labels):
+    """
+    Increments a counter, e.g. count("cache_requests", cache="cube")
+    :param name: counter name
+    :param labels: label values of the counter
+    """
+    if ENABLED:
+        metrics.increment(name, **labels)
+
+
+def start_rerun(page):
+    """
+    Starts collecting the spans of the rerun that runs on this thread
+    :param page: name of the rendered page
+    """
+    if ENABLED:
+        _rerun.page = page
+        _rerun.spans = []
+        _rerun.start = time.perf_counter()
+
+
+def end_rerun():
+    """
+    Logs the spans of this rerun as one JSON line
+    :return: list of (span name, seconds) of the rerun, empty when disabled
+    """
+    spans = getattr(_rerun, "spans", None)
+    if not ENABLED or spans is None:
+        return []
+    seconds = time.perf_counter() - _rerun.start
+    metrics.observe("rerun", seconds)
+    logger.info(json.dumps({
+        "event": "rerun",
+        "page": _rerun.page,
+        "seconds": round(seconds, 4),
+        "spans": [{"name": name, "seconds": round(value, 4)} for name, value in spans],
+    }, ensure_ascii=False))
+    _rerun.spans = None
+    return spans
+
+
+def rss_mb():
+    """
+    :return: resident size of the process in MB, or None where /proc is not available
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        return None
+
+
+def session_memory_mb(session_state):
+    """
+    Approximates the memory a session holds on its own: the values in its session state. The shared
+    frames are counted once for the process, see shared_data.py.
+    :param session_state: st.session_state or any mapping
+    :return: size in MB
+    """
+    total = 0
+    for value in session_state.values():
+        memory_usage = getattr(value, "memory_usage", None)
+        if callable(memory_usage):
+            usage = memory_usage(deep=True)
+            total += int(usage.sum()) if hasattr(usage, "sum") else int(usage)
+        else:
+            total += sys.getsizeof(value)
+    return total / 2 ** 20
+
+
+def cache_stats(caches):
+    """
+    :param caches: dict of cache name -> lru.LRUCache
+    :return: dict of cache name -> {"hits", "misses"}, including the data caches counted by count()
+    """
+    stats = {name: {"hits": cache.hits, "misses": cache.misses} for name, cache in caches.items()}
+    counters = metrics.snapshot()["counters"]
+    requests, misses = {}, {}
+    for (name, labels), value in counters.items():
+        cache = dict(labels).get("cache")
+        if name == "cache_requests":
+            requests[cache] = value
+        elif name == "cache_misses":
+            misses[cache] = value
+    for cache in set(requests) | set(misses):
+        # a cache filled by another loader, like the cube by the 7.10 counts, has misses without requests
+        stats[cache] = {"hits": max(requests.get(cache, 0) - misses.get(cache, 0), 0), "misses": misses.get(cache, 0)}
+    return stats
+
+
+def _labels(items):
+    return "{" + ",".join(f'{key}="{value}"' for key, value in items) + "}" if items else ""
+
+
+def prometheus_text(caches):
+    """
+    :param caches: dict of cache name -> lru.LRUCache
+    :return: the metrics in the Prometheus text exposition format
+    """
+    snapshot = metrics.snapshot()
+    lines = ["# TYPE dashboard_span_seconds summary"]
+    for name, (calls, total, _) in sorted(snapshot["spans"].items()):
+        lines.append(f'dashboard_span_seconds_count{{span="{name}"}} {calls}')
+        lines.append(f'dashboard_span_seconds_sum{{span="{name}"}} {total:.6f}')
+    lines.append("# TYPE dashboard_span_max_seconds gauge")
+    for name, (_, _, longest) in sorted(snapshot["spans"].items()):
+        lines.append(f'dashboard_span_max_seconds{{span="{name}"}} {longest:.6f}')
+    stats = sorted(cache_stats(caches).items())
+    for kind in ("hits", "misses"):
+        lines.append(f"# TYPE dashboard_cache_{kind}_total counter")
+        for cache, values in stats:
+            lines.append(f'dashboard_cache_{kind}_total{{cache="{cache}"}} {values[kind]}')
+    for (name, labels), value in sorted(snapshot["counters"].items()):
+        if name not in ("cache_requests", "cache_misses"):
+            lines.append(f"dashboard_{name}_total{_labels(labels)} {value}")
+    rss = rss_mb()
+    if rss is not None:
+        lines.append("# TYPE dashboard_resident_memory_bytes gauge")
+        lines.append(f"dashboard_resident_memory_bytes {int(rss * 2 ** 20)}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        payload = prometheus_text(self.server.caches()).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(caches, port=None, host=None):
+    """
+    Starts the /metrics endpoint once per process, in a daemon thread
+    :param caches: function without arguments returning the dict of cache name -> lru.LRUCache
+    :param port: defaults to DASHBOARD_METRICS_PORT, nothing is started without one
+    :param host: interface to listen on, defaults to DASHBOARD_METRICS_HOST
+    :return: the server, or None when disabled
+    """
+    global _server
+    port = port or METRICS_PORT
+    host = host or METRICS_HOST
+    if not ENABLED or not port:
+        return None
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+            _server.daemon_threads = True
+            _server.caches = caches
+            threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return _server
+
+
+def admin_panel(st, caches, rerun_spans):
+    """
+    Draws the metrics in the sidebar when the admin query parameter matches DASHBOARD_ADMIN_TOKEN
+    :param st: the streamlit module
+    :param caches: dict of cache name -> lru.LRUCache
+    :param rerun_spans: list of (span name, seconds) of the rerun that just ended
+    """
+    if not ENABLED or not ADMIN_TOKEN or st.query_params.get("admin") != ADMIN_TOKEN:
+        return
+    with st.sidebar.expander("מדדי ביצועים", expanded=True):
+        st.markdown("**Last rerun**")
+        st.dataframe(
+            [{"span": name, "ms": round(seconds * 1000, 1)} for name, seconds in rerun_spans],
+            hide_index=True,
+        )
+        st.markdown("**All reruns of the process**")
+        st.dataframe(
+            [
+                {"span": name, "calls": calls, "mean ms": round(total / calls * 1000, 1), "max ms": round(longest * 1000, 1)}
+                for name, (calls, total, longest) in sorted(metrics.snapshot()["spans"].items())
+            ],
+            hide_index=True,
+        )
+        st.markdown("**Caches**")
+        st.dataframe(
+            [{"cache": name, **stats} for name, stats in sorted(cache_stats(caches).items())],
+            hide_index=True,
+        )
+        rss = rss_mb()
+        st.markdown(
+            f"Process memory: {rss:.0f} MB" if rss is not None else "Process memory: n/a"
+        )
+        st.markdown(f"Session state: {session_memory_mb(st.session_state):.2f} MB")
+        st.download_button("Prometheus", prometheus_text(caches), file_name="metrics.txt")
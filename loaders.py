@@ -0,0 +1,95 @@
+"""
+Cached data loaders of the dashboard pages.
+
+The frames are held once per process and shared by every session, the pages get views, see
+shared_data.py. They are built and replaced in the background by the refresher, see refresher.py.
+main.py pins the current version at the start of every rerun, so all the loaders of one rerun read the
+same version even when a new one is swapped in halfway through. Each loader imports what it needs
+when it first runs, so a page only pays for the libraries of the data it uses: the map brings in
+geopandas, the other pages never do.
+"""
+import threading
+
+import streamlit as st
+
+from instrumentation import count
+from shared_data import view
+
+_pinned = threading.local()
+
+
+@st.cache_resource
+def data_refresher():
+    # one per process, started by the first session
+    from refresher import Refresher
+    refresher = Refresher()
+    refresher.start()
+    return refresher
+
+
+def pin_data():
+    """
+    Pins the current data version for the rerun running on this thread
+    :return: refresher.DataVersion
+    """
+    _pinned.data = data_refresher().current()
+    return _pinned.data
+
+
+def current_data():
+    """
+    :return: the DataVersion pinned for this rerun, or the current one when nothing was pinned
+    """
+    data = getattr(_pinned, "data", None)
+    return data if data is not None else data_refresher().current()
+
+
+def load_cube():
+    count("cache_requests", cache="cube")
+    return view(current_data().cube())
+
+
+def load_october7_counts():
+    count("cache_requests", cache="october7")
+    return view(current_data().october7())
+
+
+def load_heatmap_data():
+    count("cache_requests", cache="heatmap")
+    return view(current_data().heatmap())
+
+
+def load_district_facts():
+    count("cache_requests", cache="district_facts")
+    return view(current_data().district_facts())
+
+
+@st.cache_resource
+def query_service():
+    # one per process, the queries of a rerun run on its pinned version
+    from query_service import QueryService
+    return QueryService(current_data)
+
+
+def load_statistic_group_counts():
+    count("cache_requests", cache="statistic_groups")
+    return view(current_data().statistic_groups())
+
+
+def load_data_version():
+    # keys the cached figures, so a new snapshot never shows an old chart
+    return current_data().version
+
+
+@st.cache_resource
+def load_merhav_boundaries():
+    # read from the GeoParquet cache, the geodatabase is only decoded when the zip changes
+    from geo import prepare_merhav_boundaries
+    return prepare_merhav_boundaries()
+
+
+@st.cache_resource
+def load_merhav_geojson(detail=None):
+    # simplified once, the figure reuses the parsed dict on every rerun
+    from geo import boundaries_geojson
+    return boundaries_geojson(load_merhav_boundaries(), detail)
@@ -0,0 +1,69 @@
+"""
+Least recently used cache of the process, used for the rendered figures (see figures.py) and the
+query results (see query_service.py).
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class LRUCache:
+    """
+    Least recently used cache shared by every session of the process
+    """
+
+    def __init__(self, maxsize):
+        """
+        :param maxsize: number of values kept, 0 keeps none
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._values = OrderedDict()
+        self._pending = {}  # key -> Future of the value being created
+        # held for the lookups only, a slow miss does not block the hits of other sessions
+        self._lock = threading.Lock()
+
+    def get_or_create(self, key, create):
+        """
+        :param key: hashable state of the value, including the data version
+        :param create: function without arguments returning the value, called on a miss only. A caller
+            asking for a key that is being created waits for that value instead of creating it again.
+        :return: the cached or created value
+        """
+        with self._lock:
+            if key in self._values:
+                self.hits += 1
+                self._values.move_to_end(key)
+                return self._values[key]
+            pending = self._pending.get(key)
+            if pending is None:
+                self.misses += 1
+                future = self._pending[key] = Future()
+            else:
+                self.hits += 1
+        if pending is not None:
+            return pending.result()
+
+        try:
+            value = create()
+        except BaseException as e:
+            with self._lock:
+                del self._pending[key]
+            future.set_exception(e)
+            raise
+        with self._lock:
+            del self._pending[key]
+            if self.maxsize > 0:
+                self._values[key] = value
+                while len(self._values) > self.maxsize:
+                    self._values.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def __len__(self):
+        return len(self._values)
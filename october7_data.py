@@ -0,0 +1,42 @@
+"""
+Counts of the 7.10 page: crime per category, period (before / after the 7.10.2023) and Police district,
+normalized to one quarter.
+"""
+import pandas as pd
+
+from cube import rollup
+
+ALL_DISTRICTS = "כל המחוזות"
+
+
+def preprocess_data_district(df):
+    """
+    preprocessed the districts names
+    :param df: out data frame
+    :return: pandas df with the district names preprocessed
+    """
+    # remove nan values
+    filtered_df = df[~df["PoliceDistrict"].isin(["כל הארץ", ""])]
+
+    # make a joined district
+    aggregated_df = filtered_df.groupby(["Category", "Period"], observed=True).agg({"Count": "sum"}).reset_index()
+    aggregated_df["PoliceDistrict"] = ALL_DISTRICTS
+    combined_df = pd.concat([filtered_df, aggregated_df], ignore_index=True)
+
+    return combined_df
+
+
+def district_counts(cube):
+    """
+    :param cube: the output of cube.build_cube
+    :return: pandas df with Category, Period, PoliceDistrict (including ALL_DISTRICTS), Count and
+        NormalizedCount, the count per quarter of the period
+    """
+    grouped = preprocess_data_district(rollup(cube, ["Category", "Period", "PoliceDistrict"]))
+
+    # Normalize by the number of quarters each period has in the data
+    period_quarters = cube.groupby("Period", observed=True)["PeriodQuarters"].first()
+    grouped["NormalizedCount"] = (
+        grouped["Count"] / grouped["Period"].map(period_quarters).astype(int)
+    ).round().astype(int)
+    return grouped
@@ -0,0 +1,116 @@
+"""
+Downloads and prepares the yearly resources in parallel worker processes.
+
+Building the frames from the JSON records (decoding, DataFrame construction, categorization, the
+time columns) is CPU bound and runs one year at a time in a single process. Here every year is
+handed to a worker of a process pool. The worker downloads the records of its year itself, so the
+JSON decoding (streamed into typed frames, see record_stream.py) is spread over the workers too, runs
+prepare_year, and sends the frame back as an Arrow IPC stream: one contiguous buffer with the column
+data and the pandas metadata (categories, nullable integer types), instead of a pickled DataFrame or
+pickled records. The scaling stops at the number of yearly resources.
+
+PREPARE_WORKERS sets the number of processes. With 1 everything runs in this process as before: one
+download of all the years on a thread pool, then prepare_year year by year. The same happens when the
+workers can not be started, e.g. when the main script of the process can not be imported again.
+"""
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import pyarrow as pa
+
+import datastore
+from crime_data import prepare_year
+from datastore import MAX_WORKERS, RESOURCE_IDS, CircuitOpenError, breaker, fetch_all
+
+logger = logging.getLogger(__name__)
+
+PREPARE_WORKERS = int(os.environ.get("PREPARE_WORKERS", str(min(os.cpu_count() or 1, len(RESOURCE_IDS)))))
+
+
+def to_ipc(df):
+    """
+    :param df: pandas df
+    :return: pyarrow Buffer with the df as an Arrow IPC stream
+    """
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def from_ipc(buffer):
+    """
+    :param buffer: output of to_ipc
+    :return: the pandas df
+    """
+    return pa.ipc.open_stream(buffer).read_all().to_pandas()
+
+
+def _prepare_worker(year, resource_id, base_url, offset, fetch_kwargs):
+    # the circuit breakers of a worker die with it, a failed download is returned to be counted by the
+    # breaker of the resource in the parent (see datastore.degraded)
+    try:
+        df = fetch_all({year: resource_id}, base_url=base_url, offsets={year: offset}, frames=True, **fetch_kwargs)[year]
+    except Exception as e:
+        return None, e
+    return to_ipc(prepare_year(df, year)), None
+
+
+def prepare_all(resource_ids=None, base_url=None, offsets=None, workers=None, **fetch_kwargs):
+    """
+    Downloads the resources and prepares the frame of every year
+    :param resource_ids: dict of year -> resource_id, defaults to RESOURCE_IDS
+    :param base_url: CKAN action API url, defaults to datastore.DATASTORE_URL
+    :param offsets: optional dict of year -> number of leading records to skip, for incremental downloads
+    :param workers: number of processes, defaults to PREPARE_WORKERS
+    :param fetch_kwargs: passed on to datastore.fetch_all. Its max_workers bounds the requests in flight
+        of all the processes together.
+    :return: dict of year -> prepared pandas df, see crime_data.prepare_year
+    """
+    resource_ids = resource_ids or RESOURCE_IDS
+    offsets = offsets or {}
+    workers = min(workers or PREPARE_WORKERS, len(resource_ids))
+    if workers > 1 and "session" not in fetch_kwargs:
+        # a session can not be shared with other processes
+        try:
+            return _prepare_in_pool(resource_ids, base_url, offsets, workers, fetch_kwargs)
+        except BrokenProcessPool:
+            logger.warning("The prepare workers died, preparing the years in this process")
+
+    frames = fetch_all(resource_ids, base_url=base_url, offsets=offsets, frames=True, **fetch_kwargs)
+    return {year: prepare_year(df, year) for year, df in frames.items()}
+
+
+def _start_method():
+    # forkserver: the workers do not inherit the threads of a running dashboard. Where it does not
+    # exist (Windows) spawn, which does not inherit them either.
+    return "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+
+def _prepare_in_pool(resource_ids, base_url, offsets, workers, fetch_kwargs):
+    # the workers import datastore anew, so they are given the url in use here
+    base_url = base_url or datastore.DATASTORE_URL
+    for resource_id in resource_ids.values():
+        # an open circuit fails fast like in this process, the breakers of the workers start closed
+        if breaker(resource_id).state == "open":
+            raise CircuitOpenError(f"circuit of {resource_id} open after {breaker(resource_id).failures} failures")
+    # the request threads are shared out, all the workers together keep to max_workers requests in flight
+    fetch_kwargs = {**fetch_kwargs, "max_workers": max(1, fetch_kwargs.get("max_workers", MAX_WORKERS) // workers)}
+    with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context(_start_method())) as pool:
+        futures = {
+            year: pool.submit(_prepare_worker, year, resource_id, base_url, offsets.get(year, 0), fetch_kwargs)
+            for year, resource_id in resource_ids.items()
+        }
+        frames = {}
+        for year, future in futures.items():
+            buffer, error = future.result()
+            if error is not None:
+                breaker(resource_ids[year]).record_failure()
+                raise error
+            breaker(resource_ids[year]).record_success()
+            frames[year] = from_ipc(buffer)
+        return frames
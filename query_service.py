@@ -0,0 +1,169 @@
+"""
+Query service over the crime records, for every frontend of the data.
+
+The Streamlit pages, crime_dashboard.py and the Dash notebooks each downloaded the records and grouped
+them again on their own. The service answers every count they draw, filtered and summed by any of
+QUERY_DIMENSIONS, from the count cube of the current data version (see cube.py and refresher.py).
+The results are kept in an LRU cache keyed by the data version and the normalized query, so the
+same chart asked for by another session or another frontend is not grouped again, and a new data
+version never serves an old result.
+
+In the process:
+
+    from query_service import QueryService
+    service = QueryService()
+    service.query(["Year", "Category"], PoliceDistrict="מחוז תא")
+
+Over HTTP, the rows as JSON, for the frontends running in other processes:
+
+    python query_service.py --port 8503
+    curl 'http://127.0.0.1:8503/query?by=Year,Category&Year=2023&Year=2024'
+    curl 'http://127.0.0.1:8503/dimensions'
+"""
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from cube import rollup
+from instrumentation import span
+from lru import LRUCache
+from shared_data import view
+
+QUERY_DIMENSIONS = [
+    "Year", "Quarter", "YearQuarter", "Period", "Category", "PoliceDistrict", "PoliceMerhav", "StatisticGroup",
+]
+QUERY_CACHE_SIZE = int(os.environ.get("QUERY_CACHE_SIZE", "256"))
+QUERY_PORT = int(os.environ.get("QUERY_PORT", "8503"))
+
+
+def normalize_query(by, filters):
+    """
+    Brings equal queries to the same key: the filters sorted by dimension with their values sorted and
+    deduplicated, a single value as a list of one, and the years given as text (like in a URL) as numbers
+    :param by: list of dimensions to keep, in the order of the result columns
+    :param filters: dict of dimension -> value or list of values to keep
+    :return: tuple of (by, filters) as nested tuples
+    :raise ValueError: on no `by` dimension or one that is not in QUERY_DIMENSIONS
+    """
+    by = tuple(dict.fromkeys(by))
+    if not by:
+        raise ValueError("nothing to group by")
+    unknown = [column for column in list(by) + list(filters) if column not in QUERY_DIMENSIONS]
+    if unknown:
+        raise ValueError(f"unknown dimensions {unknown}, choose from {QUERY_DIMENSIONS}")
+    normalized = []
+    for column, value in sorted(filters.items()):
+        values = value if isinstance(value, (list, tuple, set)) else [value]
+        if column == "Year":
+            values = [int(year) for year in values]
+        normalized.append((column, tuple(sorted(set(values), key=str))))
+    return by, tuple(normalized)
+
+
+class QueryService:
+    """
+    Counts per dimension of the current data version, with an LRU cache of the results
+    """
+
+    def __init__(self, data=None, cache_size=QUERY_CACHE_SIZE):
+        """
+        :param data: function without arguments returning the refresher.DataVersion to query. Defaults to
+            the current version of a refresher of the service's own, which keeps it up to date.
+        :param cache_size: number of results kept
+        """
+        if data is None:
+            from refresher import Refresher
+            refresher = Refresher()
+            refresher.start()
+            data = refresher.current
+        self._data = data
+        self.cache = LRUCache(cache_size)
+
+    def query(self, by, **filters):
+        """
+        :param by: list of dimensions to keep, see QUERY_DIMENSIONS
+        :param filters: dimension=value or dimension=[values] to keep
+        :return: pandas df with the `by` columns and "Count", see cube.rollup
+        """
+        by, filters = normalize_query(by, filters)
+        data = self._data()
+
+        def run():
+            with span("query.rollup"):
+                return rollup(data.cube(), list(by), **{column: list(values) for column, values in filters})
+
+        return view(self.cache.get_or_create((data.version, by, filters), run))
+
+    def dimensions(self):
+        """
+        :return: dict of dimension -> sorted list of its values, for the filter widgets of a frontend
+        """
+        return {
+            column: sorted(self.query([column])[column].tolist(), key=str)
+            for column in QUERY_DIMENSIONS
+        }
+
+    def version(self):
+        """
+        :return: the data version the queries run on
+        """
+        return self._data().version
+
+
+class _QueryHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        url = urlparse(self.path)
+        service = self.server.service
+        params = parse_qs(url.query)
+        try:
+            if url.path.rstrip("/") == "/query":
+                by = [column for value in params.pop("by", []) for column in value.split(",") if column]
+                rows = service.query(by, **params).to_dict("records")
+                self._reply(200, {"version": service.version(), "by": by, "rows": rows})
+            elif url.path.rstrip("/") == "/dimensions":
+                self._reply(200, {"version": service.version(), "dimensions": service.dimensions()})
+            else:
+                self._reply(404, {"error": "not found, use /query or /dimensions"})
+        except ValueError as e:
+            self._reply(400, {"error": str(e)})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body, ensure_ascii=False, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(service, port=QUERY_PORT, host="127.0.0.1"):
+    """
+    Starts the HTTP endpoint of a service in a daemon thread
+    :param service: QueryService
+    :param port: port to listen on, 0 picks a free one
+    :param host: interface to listen on
+    :return: the server, server.server_address has the port
+    """
+    server = ThreadingHTTPServer((host, port), _QueryHandler)
+    server.daemon_threads = True
+    server.service = service
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the crime counts as JSON")
+    parser.add_argument("--port", type=int, default=QUERY_PORT)
+    parser.add_argument("--host", default="127.0.0.1")
+    args = parser.parse_args()
+
+    service = QueryService()
+    serve(service, args.port, args.host)
+    print(f"serving version {service.version()} on http://{args.host}:{args.port}/query")
+    threading.Event().wait()
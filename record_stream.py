@@ -0,0 +1,109 @@
+"""
+Streaming decoder of the datastore_search responses.
+
+response.json() followed by pd.DataFrame(records) keeps the raw body, the parsed list of record dicts
+and the frame in memory at the same time, and the dicts of a whole year were kept until the year was
+prepared. Here the body is read in chunks as it arrives and the records are decoded one at a time
+from the "records" array. Every BATCH_SIZE records become a small frame in the compact schema of
+crime_data (categoricals and small integers), and the dicts of the batch are dropped. So at any time
+only one chunk of the body and one batch of dicts are held next to the typed frames.
+
+The rest of the response (success, total, ...) is small, it is decoded at the end with the records
+array left empty.
+"""
+import codecs
+import json
+import re
+
+import pandas as pd
+
+from crime_data import apply_schema, concat_frames
+
+CHUNK_SIZE = 2 ** 20  # bytes read from the response at a time
+BATCH_SIZE = 10000  # records decoded into dicts before they become a typed frame
+
+RECORDS_KEY = re.compile(r'"records"\s*:\s*\[')
+WHITESPACE = re.compile(r"[\s,]*")
+
+
+class RecordStream:
+    """
+    Decodes the records of a datastore_search response body while it is being read
+    :param chunks: iterable of bytes, e.g. response.iter_content(CHUNK_SIZE)
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._text = codecs.getincrementaldecoder("utf-8")()
+        self._decoder = json.JSONDecoder()
+        self.response = None  # the decoded body with an empty records array, set once it was read
+
+    def _read(self):
+        # the next piece of the body as text, "" at the end
+        for chunk in self._chunks:
+            text = self._text.decode(chunk)
+            if text:
+                return text
+        return self._text.decode(b"", final=True)
+
+    def batches(self, size=BATCH_SIZE):
+        """
+        :param size: records per batch
+        :return: generator of lists of record dicts, in the order of the response
+        """
+        buffer = ""
+        match = None
+        while match is None:
+            text = self._read()
+            if not text:
+                # no records array, e.g. an error response
+                self.response = json.loads(buffer)
+                return
+            buffer += text
+            match = RECORDS_KEY.search(buffer)
+        head = buffer[:match.end()]
+        buffer, position = buffer[match.end():], 0
+
+        batch = []
+        while True:
+            position = WHITESPACE.match(buffer, position).end()
+            if buffer.startswith("]", position):
+                break
+            try:
+                record, position = self._decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # the record goes on in the next chunk
+                text = self._read()
+                if not text:
+                    raise
+                buffer, position = buffer[position:] + text, 0
+                continue
+            batch.append(record)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+        tail = [buffer[position:]]
+        text = self._read()
+        while text:
+            tail.append(text)
+            text = self._read()
+        self.response = json.loads(head + "".join(tail))
+
+
+def read_response(chunks, batch_size=BATCH_SIZE):
+    """
+    Decodes a datastore_search response body into a typed frame
+    :param chunks: iterable of bytes of the body
+    :param batch_size: records per batch
+    :return: the response dict, with the records of its result as a pandas df in the compact schema
+        (see crime_data.apply_schema) instead of a list
+    """
+    stream = RecordStream(chunks)
+    frames = [apply_schema(pd.DataFrame(batch)) for batch in stream.batches(batch_size)]
+    result = stream.response.get("result")
+    if isinstance(result, dict) and "records" in result:
+        result["records"] = concat_frames(frames, report=False) if frames else pd.DataFrame()
+    return stream.response
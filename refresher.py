@@ -0,0 +1,245 @@
+"""
+Background refresh of the crime data.
+
+A daemon thread updates the snapshot every REFRESH_INTERVAL seconds (see snapshot_store.update). When
+the published version changed, it builds what the pages read from the new version: the count cube
+and the other tables that were already in use, read from the precomputed artifacts of the version
+when they exist (see artifacts.py) and built from the records otherwise. Only once all of them are built is the new
+DataVersion swapped in, with one assignment. A rerun therefore sees the old version or the new one
+whole and never waits for a download. A version published by another process, e.g. a cron job
+running `python snapshot_store.py update`, is picked up the same way.
+
+While data.gov.il is failing, the pages keep serving the last good version (the resources that
+failed keep their records, see snapshot_store.update) and the refresher retries every
+REVALIDATE_INTERVAL seconds instead of waiting for the next interval. Only the very first start of a
+server without any snapshot downloads in the request path.
+
+    python refresher.py --interval 60    # run the refresher alone and print every version it swaps in
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+import artifacts
+import datastore
+import snapshot_store
+from instrumentation import count, span
+
+logger = logging.getLogger(__name__)
+
+REFRESH_INTERVAL = float(os.environ.get("REFRESH_INTERVAL", str(6 * 60 * 60)))  # seconds, 0 disables the thread
+REVALIDATE_INTERVAL = float(os.environ.get("REVALIDATE_INTERVAL", str(datastore.RESET_TIMEOUT)))  # while degraded
+
+
+class DataVersion:
+    """
+    One published snapshot with the tables derived from it, each built on first use. Shared read-only
+    by every session.
+    """
+
+    def __init__(self, version, created, root=None, use_artifacts=True):
+        """
+        :param version: snapshot version
+        :param created: datetime the snapshot was published
+        :param root: snapshot directory, defaults to snapshot_store.SNAPSHOT_DIR
+        :param use_artifacts: read the tables from the artifacts of the version when they exist
+        """
+        self.version = version
+        self.created = created
+        self.root = root
+        self.use_artifacts = use_artifacts
+        self._derived = {}
+        self._lock = threading.RLock()  # a table may be derived from another one
+
+    def age(self):
+        """
+        :return: seconds since the snapshot was published
+        """
+        return (datetime.now(timezone.utc) - self.created).total_seconds()
+
+    @property
+    def derived_names(self):
+        """
+        :return: names of the tables built so far
+        """
+        return list(self._derived)
+
+    def _derive(self, name, build):
+        with self._lock:
+            if name not in self._derived:
+                count("cache_misses", cache=name)
+                with span(f"load.{name}"):
+                    table = artifacts.read_artifact(self.version, name) if self.use_artifacts else None
+                    self._derived[name] = build() if table is None else table
+            return self._derived[name]
+
+    def data(self):
+        """
+        :return: every record of this version, see crime_data.finalize. Built anew on every call and not
+            kept, only the cube is built from it and no page loads it.
+        """
+        from crime_data import finalize
+        with span("load.data"):
+            return finalize(snapshot_store.load_snapshot(self.version, self.root))
+
+    def cube(self):
+        """
+        :return: the count cube of this version, see cube.py
+        """
+        def build():
+            from cube import build_cube
+            return build_cube(self.data())
+        return self._derive("cube", build)
+
+    def october7(self):
+        """
+        :return: the normalized counts of the 7.10 page, see october7_data.py
+        """
+        def build():
+            from october7_data import district_counts
+            return district_counts(self.cube())
+        return self._derive("october7", build)
+
+    def heatmap(self):
+        """
+        :return: the heatmap dataset of this version, see heatmap_data.py
+        """
+        def build():
+            # geopandas is only imported once the map is opened
+            from heatmap_data import prepare_heatmap_dataset
+            return prepare_heatmap_dataset(version=self.version, snapshot_root=self.root)
+        return self._derive("heatmap", build)
+
+    def district_facts(self):
+        """
+        :return: the district-year fact table of this version, see district_facts.py
+        """
+        def build():
+            from district_facts import build_district_facts
+            return build_district_facts(self.cube())
+        return self._derive("district_facts", build)
+
+    def statistic_groups(self):
+        """
+        :return: the counts per year and statistic group of every record, see group_counts.py
+        """
+        def build():
+            from group_counts import GROUP_COLUMNS, build_group_counts
+            return build_group_counts(snapshot_store.iter_partitions(self.version, self.root, GROUP_COLUMNS))
+        return self._derive("statistic_groups", build)
+
+
+def build_version(version, root=None):
+    """
+    Reads a snapshot version and derives the count cube, which every page but the map reads
+    :param version: snapshot version
+    :param root: snapshot directory, defaults to snapshot_store.SNAPSHOT_DIR
+    :return: DataVersion
+    """
+    manifest = snapshot_store.read_manifest(version, root)
+    data = DataVersion(version, datetime.fromisoformat(manifest["created"]), root)
+    data.cube()
+    return data
+
+
+class Refresher(threading.Thread):
+    """
+    Holds the current DataVersion and replaces it in the background when a new snapshot is published
+    """
+
+    def __init__(self, interval=REFRESH_INTERVAL, root=None, base_url=None):
+        """
+        :param interval: seconds between updates, 0 to never update in the background
+        :param root: snapshot directory, defaults to snapshot_store.SNAPSHOT_DIR
+        :param base_url: CKAN action API url, defaults to datastore.DATASTORE_URL
+        """
+        super().__init__(name="data-refresher", daemon=True)
+        self.interval = interval
+        self.root = root
+        self.base_url = base_url
+        self.last_check = None
+        self.last_error = None
+        self.stale_years = []  # years whose resource failed on the last check
+        self._current = None
+        self._build_lock = threading.Lock()  # one build at a time
+        self._stopped = threading.Event()
+
+    def start(self):
+        if self.interval > 0:
+            super().start()
+
+    def stop(self):
+        self._stopped.set()
+
+    @property
+    def degraded(self):
+        """
+        :return: True if the last check could not reach every resource
+        """
+        return self.last_error is not None or bool(self.stale_years)
+
+    def current(self):
+        """
+        :return: the current DataVersion. Only blocks while the first one is built.
+        """
+        current = self._current
+        if current is None:
+            with self._build_lock:
+                if self._current is None:
+                    if snapshot_store.current_version(self.root) is None:
+                        # nothing to serve yet, this one download is in the request path
+                        snapshot_store.refresh(self.root, base_url=self.base_url)
+                    self._current = build_version(snapshot_store.current_version(self.root), self.root)
+            current = self._current
+        return current
+
+    def refresh(self):
+        """
+        Updates the snapshot and swaps in the new version if there is one
+        :return: True if a new version was swapped in
+        """
+        try:
+            snapshot_store.update(self.root, base_url=self.base_url)
+            self.last_error = None
+        except Exception as e:
+            # keep serving what we have, another process may still have published a version
+            logger.exception("Snapshot update failed")
+            self.last_error = e
+        self.stale_years = datastore.degraded()
+        self.last_check = datetime.now(timezone.utc)
+
+        version = snapshot_store.current_version(self.root)
+        previous = self._current
+        if version is None or (previous is not None and previous.version == version):
+            return False
+        with self._build_lock:
+            new = build_version(version, self.root)
+            # the tables the pages already used are built before the swap too
+            for name in previous.derived_names if previous is not None else []:
+                getattr(new, name)()
+            self._current = new
+        logger.info("Swapped in data version %s", version)
+        return True
+
+    def run(self):
+        while not self._stopped.wait(min(self.interval, REVALIDATE_INTERVAL) if self.degraded else self.interval):
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("Building the new data version failed")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Refresh the crime data in the background")
+    parser.add_argument("--interval", type=float, default=REFRESH_INTERVAL, help="seconds between updates")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    refresher = Refresher(args.interval)
+    print(f"serving {refresher.current().version}")
+    refresher.start()
+    while refresher.is_alive():
+        time.sleep(1)
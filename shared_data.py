@@ -0,0 +1,23 @@
+"""
+Datasets shared read-only by every session of the process.
+
+st.cache_data pickles the value it caches and unpickles a new copy for every caller, so each session
+(and each call in a session) holds its own copy of the data. st.cache_resource hands out the one
+object it holds instead. The dashboard keeps its frames there and the pages only ever get a view()
+of them: a shallow copy that shares the columns of the process-wide frame. With copy-on-write, a
+column the page assigns or modifies is copied at that moment in the view only, so the shared frame
+never changes and nothing is copied for the columns the page only reads.
+"""
+import pandas as pd
+
+if int(pd.__version__.split(".")[0]) < 3:
+    # pandas 3 always copies on write, earlier versions have it behind an option
+    pd.set_option("mode.copy_on_write", True)
+
+
+def view(df):
+    """
+    :param df: a shared frame, which must not be modified
+    :return: a zero-copy view of it that the caller may modify freely
+    """
+    return df.copy(deep=False)
@@ -0,0 +1,311 @@
+"""
+Versioned on-disk snapshot of the crime records.
+
+Every refresh writes a new directory under SNAPSHOT_DIR with one Parquet file per (year, resource_id)
+and a manifest, then moves the CURRENT pointer to it. Readers only ever follow CURRENT, so a refresh
+in progress is never visible half-written.
+
+    python snapshot_store.py refresh   # download everything and publish a new version
+    python snapshot_store.py update    # download only the resources (or rows) that changed
+    python snapshot_store.py info      # show the current version
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import time
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from crime_data import concat_frames
+from datastore import RESOURCE_IDS, fetch_states
+from parallel_prepare import prepare_all
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+KEEP_VERSIONS = 3  # older versions are pruned after a refresh
+
+
+def _pointer_path(root):
+    return os.path.join(root, "CURRENT")
+
+
+def current_version(root=None):
+    """
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :return: name of the published version, or None if nothing was published yet
+    """
+    try:
+        with open(_pointer_path(root or SNAPSHOT_DIR), encoding="utf-8") as f:
+            version = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return version or None
+
+
+def read_manifest(version=None, root=None):
+    """
+    :param version: snapshot version, defaults to the current one
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :return: the manifest dict, or None if there is no such snapshot
+    """
+    root = root or SNAPSHOT_DIR
+    version = version or current_version(root)
+    if version is None:
+        return None
+    try:
+        with open(os.path.join(root, version, "manifest.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def write_snapshot(frames, resource_ids=None, root=None, states=None, reuse=None):
+    """
+    Writes a new version and publishes it
+    :param frames: dict of year -> prepared pandas df to write
+    :param resource_ids: dict of year -> resource_id, defaults to RESOURCE_IDS
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :param states: optional dict of year -> datastore.resource_state() at download time
+    :param reuse: optional dict of year -> partition of the previous version to carry over unchanged
+    :return: the new version name
+    """
+    root = root or SNAPSHOT_DIR
+    resource_ids = resource_ids or RESOURCE_IDS
+    states = states or {}
+    reuse = reuse or {}
+    previous = current_version(root)
+    version = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+    tmp_dir = os.path.join(root, f".{version}.tmp")
+    os.makedirs(tmp_dir)
+
+    partitions = []
+    for year, part in reuse.items():
+        # untouched partitions are linked, not rewritten
+        source = os.path.join(root, previous, part["file"])
+        target = os.path.join(tmp_dir, part["file"])
+        try:
+            os.link(source, target)
+        except OSError:
+            shutil.copy2(source, target)
+        partitions.append(part)
+
+    for year, df in frames.items():
+        file_name = f"{year}-{resource_ids[year]}.parquet"
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), os.path.join(tmp_dir, file_name))
+        state = states.get(year, {})
+        partitions.append({
+            "year": int(year),
+            "resource_id": resource_ids[year],
+            "file": file_name,
+            "rows": len(df),
+            "max_id": int(df["_id"].max()) if "_id" in df and len(df) else 0,
+            "total": state.get("total", len(df)),
+            "last_modified": state.get("last_modified"),
+        })
+
+    manifest = {
+        "version": version,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "changed": sorted(int(year) for year in frames),
+        "partitions": sorted(partitions, key=lambda part: part["year"]),
+    }
+    with open(os.path.join(tmp_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.rename(tmp_dir, os.path.join(root, version))
+
+    # publish atomically
+    pointer_tmp = _pointer_path(root) + ".tmp"
+    with open(pointer_tmp, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer_tmp, _pointer_path(root))
+
+    _prune(root, keep=version)
+    return version
+
+
+def list_versions(root=None):
+    """
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :return: sorted names of the versions on disk, the oldest first
+    """
+    root = root or SNAPSHOT_DIR
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if os.path.isdir(os.path.join(root, name)) and not name.startswith(".")
+    )
+
+
+def _prune(root, keep):
+    versions = list_versions(root)
+    for name in versions[:-KEEP_VERSIONS]:
+        if name != keep:
+            shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+
+def read_partitions(version=None, root=None):
+    """
+    Reads every partition of a snapshot, memory-mapped
+    :param version: snapshot version, defaults to the current one
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :return: dict of year -> pandas df, or None if there is no snapshot
+    """
+    if read_manifest(version, root) is None:
+        return None
+    return dict(iter_partitions(version, root))
+
+
+def iter_partitions(version=None, root=None, columns=None):
+    """
+    Reads the partitions of a snapshot one at a time, for consumers that do not need every year in memory
+    :param version: snapshot version, defaults to the current one
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :param columns: optional list of the columns to read
+    :return: generator of (year, pandas df)
+    """
+    root = root or SNAPSHOT_DIR
+    manifest = read_manifest(version, root)
+    if manifest is None:
+        return
+    directory = os.path.join(root, manifest["version"])
+    for part in manifest["partitions"]:
+        yield part["year"], pq.read_table(
+            os.path.join(directory, part["file"]), columns=columns, memory_map=True,
+        ).to_pandas()
+
+
+def load_snapshot(version=None, root=None):
+    """
+    :param version: snapshot version, defaults to the current one
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :return: all years concatenated in one pandas df, or None if there is no snapshot
+    """
+    partitions = read_partitions(version, root)
+    if partitions is None:
+        return None
+    return concat_frames([partitions[year] for year in sorted(partitions)])
+
+
+def refresh(root=None, resource_ids=None, base_url=None, **fetch_kwargs):
+    """
+    Downloads all the resources and publishes them as a new snapshot version
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :param resource_ids: dict of year -> resource_id, defaults to RESOURCE_IDS
+    :param base_url: CKAN action API url, defaults to datastore.DATASTORE_URL
+    :param fetch_kwargs: passed on to parallel_prepare.prepare_all
+    :return: the new version name
+    """
+    resource_ids = resource_ids or RESOURCE_IDS
+    # read the states first, a change during the download is then caught by the next update
+    states = fetch_states(resource_ids, base_url=base_url)
+    frames = prepare_all(resource_ids, base_url=base_url, **fetch_kwargs)
+    return write_snapshot(frames, resource_ids, root, states)
+
+
+def update(root=None, resource_ids=None, base_url=None, **fetch_kwargs):
+    """
+    Refreshes only what changed since the current snapshot. A resource whose last_modified and total
+    are unchanged is carried over as is, a resource that only grew gets its new rows (past the last
+    seen _id) appended, and anything else is downloaded again in full, as is a grown resource whose
+    rows turn out not to be the old ones plus new ones. A resource that cannot be
+    reached keeps its records of the current snapshot, stale, until a later update reaches it.
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :param resource_ids: dict of year -> resource_id, defaults to RESOURCE_IDS
+    :param base_url: CKAN action API url, defaults to datastore.DATASTORE_URL
+    :param fetch_kwargs: passed on to parallel_prepare.prepare_all
+    :return: the current version name after the update
+    """
+    root = root or SNAPSHOT_DIR
+    resource_ids = resource_ids or RESOURCE_IDS
+    manifest = read_manifest(root=root)
+    if manifest is None:
+        return refresh(root, resource_ids, base_url, **fetch_kwargs)
+
+    states = fetch_states(resource_ids, base_url=base_url, return_exceptions=True)
+    previous = {part["year"]: part for part in manifest["partitions"]}
+    reuse, offsets, changed = {}, {}, {}
+    for year, state in states.items():
+        part = previous.get(year)
+        if isinstance(state, Exception):
+            if part is None or part["resource_id"] != resource_ids[year]:
+                raise state
+            logger.warning("Keeping the %s records of version %s: %s", year, manifest["version"], state)
+            reuse[year] = part
+        elif part is None or part["resource_id"] != resource_ids[year]:
+            changed[year] = resource_ids[year]
+        elif part["last_modified"] == state["last_modified"] and part["total"] == state["total"]:
+            reuse[year] = part
+        elif state["total"] > part["total"]:
+            changed[year] = resource_ids[year]
+            # one row early, the last row seen before must still be there
+            offsets[year] = max(part["total"] - 1, 0)
+        else:
+            changed[year] = resource_ids[year]
+
+    if not changed:
+        return manifest["version"]
+
+    prepared = prepare_all(changed, base_url=base_url, offsets=offsets, **fetch_kwargs)
+    old = read_partitions(manifest["version"], root)
+    frames, refetch = {}, {}
+    for year, df in prepared.items():
+        if year in offsets:
+            # a grown total does not mean the rows were only appended: rows deleted next to new ones
+            # shift the offset. The first row fetched must be the last one seen and the merge must
+            # add up to the new total, else the year is downloaded again in full.
+            max_id = previous[year]["max_id"]
+            appended = len(df) > 0 and (df["_id"].iloc[0] == max_id or not previous[year]["total"])
+            # only the new rows are prepared, the existing ones keep their derived columns
+            df = concat_frames([old[year], df[df["_id"] > max_id]])
+            if not appended or len(df) != states[year]["total"]:
+                logger.warning("The %s records were not only appended to, downloading them again", year)
+                refetch[year] = changed[year]
+                continue
+        frames[year] = df
+    if refetch:
+        frames.update(prepare_all(refetch, base_url=base_url, **fetch_kwargs))
+    return write_snapshot(frames, resource_ids, root, states, reuse)
+
+
+def load_or_refresh(root=None):
+    """
+    Reads the current snapshot, building it first if none exists yet
+    :param root: snapshot directory, defaults to SNAPSHOT_DIR
+    :return: pandas df of all years
+    """
+    df = load_snapshot(root=root)
+    if df is None:
+        refresh(root)
+        df = load_snapshot(root=root)
+    return df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the local crime records snapshot")
+    parser.add_argument("command", choices=["refresh", "update", "info"])
+    parser.add_argument("--root", default=SNAPSHOT_DIR, help="snapshot directory")
+    args = parser.parse_args()
+    os.makedirs(args.root, exist_ok=True)
+
+    if args.command == "refresh":
+        start = time.perf_counter()
+        version = refresh(args.root)
+        print(f"published {version} in {time.perf_counter() - start:.1f}s")
+    elif args.command == "update":
+        start = time.perf_counter()
+        version = update(args.root)
+        print(f"current version {version} after {time.perf_counter() - start:.1f}s")
+
+    manifest = read_manifest(root=args.root)
+    if manifest is None:
+        print("no snapshot")
+    else:
+        print(f"version {manifest['version']} created {manifest['created']}, changed {manifest['changed']}")
+        for part in manifest["partitions"]:
+            print(f"  {part['year']}  {part['resource_id']}  {part['rows']} rows")
@@ -0,0 +1,35 @@
+import os
+import sys
+
+import pytest
+
+# the modules of the app live at the root of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import datastore  # noqa: E402
+from datastore_stub import StubDatastore, synthetic_resources  # noqa: E402
+
+ROWS_PER_YEAR = 200
+
+
+@pytest.fixture(autouse=True)
+def breakers():
+    """
+    The circuit breakers are process-wide, every test starts with closed ones
+    """
+    datastore._breakers.clear()
+    yield datastore._breakers
+    datastore._breakers.clear()
+
+
+@pytest.fixture
+def stub():
+    with StubDatastore(synthetic_resources(ROWS_PER_YEAR)) as server:
+        yield server
+
+
+@pytest.fixture
+def snapshot_root(tmp_path, monkeypatch):
+    # no artifacts of the working copy are picked up by the data versions
+    monkeypatch.setattr("artifacts.ARTIFACTS_DIR", str(tmp_path / "artifacts"))
+    return str(tmp_path / "snapshots")
@@ -0,0 +1,118 @@
+import pytest
+import requests
+
+from datastore import CircuitBreaker, CircuitOpenError
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def fail():
+    raise requests.ConnectionError("unreachable")
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker("test", failure_threshold=3, reset_timeout=60, clock=clock)
+
+
+def open_circuit(breaker):
+    for _ in range(breaker.failure_threshold):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(fail)
+
+
+def test_opens_after_threshold(breaker):
+    for _ in range(breaker.failure_threshold - 1):
+        with pytest.raises(requests.ConnectionError):
+            breaker.call(fail)
+    assert breaker.state == "closed"
+    assert breaker.call(lambda: 1) == 1
+    assert breaker.failures == 0
+
+    open_circuit(breaker)
+    assert breaker.state == "open"
+    calls = []
+    with pytest.raises(CircuitOpenError):
+        breaker.call(calls.append, 1)
+    assert calls == []
+
+
+def test_half_open_trial_success_closes(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 60
+    assert breaker.state == "half-open"
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
+
+
+def test_half_open_trial_failure_reopens(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 60
+    with pytest.raises(requests.ConnectionError):
+        breaker.call(fail)
+    assert breaker.state == "open"
+    clock.now += 59
+    with pytest.raises(CircuitOpenError):
+        breaker.call(fail)
+
+
+def test_single_trial_at_a_time(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 60
+
+    def trial():
+        # another call while the trial runs is refused
+        with pytest.raises(CircuitOpenError):
+            breaker.call(lambda: "second")
+        return "first"
+
+    assert breaker.call(trial) == "first"
+    assert breaker.state == "closed"
+
+
+def test_unexpected_exception_in_trial(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 60
+    with pytest.raises(KeyError):
+        breaker.call(lambda: {}["result"])
+    # counted as a failure, and the trial is over
+    assert breaker.state == "open"
+    assert breaker.failures == breaker.failure_threshold + 1
+    clock.now += 60
+    assert breaker.call(lambda: "ok") == "ok"
+    assert breaker.state == "closed"
+
+
+def test_rejected_call_does_not_end_the_trial(breaker, clock):
+    open_circuit(breaker)
+    clock.now += 60
+
+    def trial():
+        with pytest.raises(CircuitOpenError):
+            breaker.call(fail)
+        assert breaker._trial
+        return "ok"
+
+    assert breaker.call(trial) == "ok"
+    assert not breaker._trial
+
+
+def test_calls_recorded_from_outside(breaker, clock):
+    for _ in range(breaker.failure_threshold):
+        breaker.record_failure()
+    assert breaker.state == "open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from crime_data import STATISTIC_GROUP_CATEGORY, categorize, categorize_statistic_group
+
+GROUPS = list(STATISTIC_GROUP_CATEGORY) + ["עבירות אחרות", "", "unknown"]
+
+
+@pytest.fixture
+def statistic_groups():
+    rng = np.random.default_rng(0)
+    values = np.array(GROUPS, dtype=object)[rng.integers(0, len(GROUPS), 1000)]
+    values[::97] = None
+    return pd.Series(values, index=np.arange(1000) * 3)
+
+
+@pytest.mark.parametrize("dtype", [object, "category"])
+def test_categorize_matches_row_wise(statistic_groups, dtype):
+    groups = statistic_groups.astype(dtype)
+    expected = [categorize_statistic_group(group) for group in statistic_groups]
+
+    result = categorize(groups)
+
+    assert result.index.equals(groups.index)
+    assert result.name == "Category"
+    # a missing category may come back as None or NaN
+    assert [None if pd.isna(category) else category for category in result] == expected
+
+
+def test_unknown_groups_have_no_category(statistic_groups):
+    result = categorize(statistic_groups)
+    unknown = ~statistic_groups.isin(list(STATISTIC_GROUP_CATEGORY))
+    assert unknown.any()
+    assert result[unknown].isna().all()
+    assert result[~unknown].notna().all()
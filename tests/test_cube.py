@@ -0,0 +1,115 @@
+import pandas as pd
+import pytest
+
+from crime_data import categorize_statistic_group, finalize, prepare_year
+from cube import build_cube, rollup
+from datastore_stub import synthetic_frame
+
+YEARS = [2020, 2021, 2022, 2023, 2024]
+
+
+@pytest.fixture(scope="module")
+def records():
+    df = pd.concat([synthetic_frame(400, year, seed=1) for year in YEARS], ignore_index=True)
+    # a quarter without any record, and records without a quarter or a district
+    df = df[~((df["Year"] == 2022) & (df["Quarter"] == "Q4"))].reset_index(drop=True)
+    df["Quarter"] = df["Quarter"].astype(object)
+    df["PoliceDistrict"] = df["PoliceDistrict"].astype(object)
+    df.loc[df.index[::37], "Quarter"] = None
+    df.loc[df.index[::53], "PoliceDistrict"] = None
+    return df
+
+
+@pytest.fixture(scope="module")
+def old(records):
+    """
+    The records as the pages grouped them before the cube: plain strings, uncategorized rows dropped
+    """
+    df = records.copy()
+    df["Category"] = df["StatisticGroup"].map(categorize_statistic_group)
+    return df.dropna(subset=["Category"])
+
+
+@pytest.fixture(scope="module")
+def cube(records):
+    prepared = pd.concat(
+        [prepare_year(records[records["Year"] == year].reset_index(drop=True), year) for year in YEARS],
+        ignore_index=True,
+    )
+    return build_cube(finalize(prepared))
+
+
+def counts(result):
+    """
+    :param result: a groupby size Series, or a rollup df
+    :return: dict of the keys as text -> count
+    """
+    if isinstance(result, pd.DataFrame):
+        result = result.set_index([column for column in result.columns if column != "Count"])["Count"]
+    return {
+        tuple(str(value) for value in (key if isinstance(key, tuple) else (key,))): int(value)
+        for key, value in result.items()
+    }
+
+
+def test_overview_all_years(old, cube):
+    assert counts(rollup(cube, ["Category"])) == counts(old.groupby("Category").size())
+
+
+@pytest.mark.parametrize("year", YEARS)
+def test_overview_year(old, cube, year):
+    expected = old[old["Year"] == year]["Category"].value_counts()
+    assert counts(rollup(cube, ["Category"], Year=year)) == counts(expected)
+
+
+def test_overview_quarters(old, cube):
+    expected = (
+        old.groupby(["Category", "Quarter", "Year"]).size().reset_index(name="Counts")
+        .groupby(["Category", "Quarter"])["Counts"].sum()
+    )
+    assert counts(rollup(cube, ["Category", "Quarter"])) == counts(expected)
+
+
+def test_trends(old, cube):
+    df = old.copy()
+    # a missing quarter counts as the first one
+    df["Quarter"] = df["Quarter"].str.extract(r"(\d)")[0].fillna("1").astype(int)
+    df["YearQuarter"] = df["Year"].astype(str) + "-Q" + df["Quarter"].astype(str)
+    expected = df.groupby(["YearQuarter", "Category"]).size()
+
+    result = rollup(cube, ["YearQuarter", "Category"])
+    assert counts(result) == counts(expected)
+    assert "2022-Q4" not in set(result["YearQuarter"].astype(str))
+
+
+def test_october7(old, cube):
+    df = old.copy()
+    quarter = df["Quarter"].str.extract(r"(\d)")[0].astype(float)
+    df["Period"] = "לפני ה7.10"
+    df.loc[(df["Year"] == 2023) & (quarter > 3), "Period"] = "אחרי ה7.10"
+    df.loc[df["Year"] == 2024, "Period"] = "אחרי ה7.10"
+    expected = df.groupby(["Category", "Period", "PoliceDistrict"]).size()
+
+    assert counts(rollup(cube, ["Category", "Period", "PoliceDistrict"])) == counts(expected)
+
+
+def test_employment(old, cube):
+    expected = old.groupby(["Year", "PoliceDistrict"]).size()
+    assert counts(rollup(cube, ["Year", "PoliceDistrict"])) == counts(expected)
+
+
+def test_dropna(old, cube):
+    # like groupby, the missing keys are dropped unless asked not to
+    kept = rollup(cube, ["PoliceDistrict"], dropna=False)
+    assert kept["Count"].sum() == len(old)
+    assert int(kept[kept["PoliceDistrict"].isna()]["Count"].iloc[0]) == int(old["PoliceDistrict"].isna().sum())
+    assert counts(rollup(cube, ["PoliceDistrict"])) == counts(old.groupby("PoliceDistrict").size())
+    assert counts(rollup(cube, ["Quarter"], dropna=False)) == counts(old.groupby("Quarter", dropna=False).size())
+
+
+def test_filters(cube):
+    one = rollup(cube, ["Category"], Year=2023)
+    many = rollup(cube, ["Category"], Year=[2023])
+    pd.testing.assert_frame_equal(one, many)
+    both = rollup(cube, ["Year"], Year=[2022, 2023])
+    assert sorted(both["Year"].tolist()) == [2022, 2023]
@@ -0,0 +1,30 @@
+import pytest
+import requests
+
+from datastore import RESOURCE_IDS, fetch_all
+
+from conftest import ROWS_PER_YEAR
+
+
+@pytest.mark.parametrize("page_size", [7, 50, ROWS_PER_YEAR, 1000])
+def test_fetch_all_pages(stub, page_size):
+    records = fetch_all(page_size=page_size, max_workers=4, base_url=stub.base_url)
+
+    assert sorted(records) == sorted(RESOURCE_IDS)
+    for year, resource_id in RESOURCE_IDS.items():
+        # every page in the API order, none twice
+        assert records[year] == stub.resources[resource_id]
+    pages = -(-ROWS_PER_YEAR // page_size)
+    assert stub.requests == len(RESOURCE_IDS) * pages
+
+
+def test_fetch_all_subset(stub):
+    resource_ids = {2022: RESOURCE_IDS[2022]}
+    records = fetch_all(resource_ids, page_size=64, base_url=stub.base_url)
+    assert list(records) == [2022]
+    assert len(records[2022]) == ROWS_PER_YEAR
+
+
+def test_fetch_all_unknown_resource(stub):
+    with pytest.raises(requests.HTTPError):
+        fetch_all({2022: "no-such-resource"}, base_url=stub.base_url)
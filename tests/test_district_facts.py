@@ -0,0 +1,57 @@
+import math
+
+import pandas as pd
+import pytest
+
+from district_facts import build_district_facts, parse_number, read_population
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("1,000.20", 1000.2),
+    ("12,345", 12345.0),
+    ("472.9", 472.9),
+    ("656", 656.0),
+    (656, 656.0),
+    (65.1, 65.1),
+])
+def test_parse_number(value, expected):
+    assert parse_number(pd.Series([value], dtype=object)).iloc[0] == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("value", ["", None, float("nan"), "n/a"])
+def test_parse_number_blank(value):
+    assert math.isnan(parse_number(pd.Series([value], dtype=object)).iloc[0])
+
+
+def test_read_population_with_separators(tmp_path):
+    path = tmp_path / "Population.csv"
+    path.write_text('PoliceDistrict,Year,Population(k)\nמחוז תא,2023,"1,000.20"\nמחוז צפון,2023,656\n', encoding="utf-8")
+    population = read_population(path).set_index("PoliceDistrict")["Population"]
+    assert population["מחוז תא"] == pytest.approx(1000.2)
+    assert population["מחוז צפון"] == pytest.approx(656)
+
+
+def test_crime_rate():
+    cube = pd.DataFrame({
+        "Year": [2023, 2023, 2023, 2023, 2024],
+        "PoliceDistrict": ["מחוז תא", "מחוז תא", "מחוז צפון", "כל הארץ", "מחוז צפון"],
+        "Category": ["a", "b", "a", "a", "a"],
+        "Count": [1500, 500, 328, 99, 10],
+    })
+    employment = pd.DataFrame({"Year": [2023], "PoliceDistrict": ["מחוז תא"], "EmploymentRate": [61.5]})
+    population = pd.DataFrame({
+        "Year": [2023, 2023, 2022],
+        "PoliceDistrict": ["מחוז תא", "מחוז צפון", "מחוז צפון"],
+        "Population": parse_number(pd.Series(["1,000.20", "656", "650"])),
+    })
+
+    facts = build_district_facts(cube, employment, population)
+
+    # crimes per 1,000 residents, the population is in thousands
+    assert facts.loc[("מחוז תא", 2023), "Crime Rate"] == pytest.approx(2000 / 1000.2)
+    assert facts.loc[("מחוז צפון", 2023), "Crime Rate"] == pytest.approx(328 / 656)
+    # a year without crimes counts 0, a year without population divides by 1
+    assert facts.loc[("מחוז צפון", 2022), "Crime Count"] == 0
+    assert facts.loc[("מחוז צפון", 2024), "Crime Rate"] == 10
+    assert "כל הארץ" not in facts.index.get_level_values("PoliceDistrict")
+    assert facts.loc[("מחוז תא", 2023), "EmploymentRate"] == 61.5
@@ -0,0 +1,41 @@
+import pandas as pd
+
+from heatmap_data import build_heatmap_dataset, merhav_join_key
+
+MAP_NAMES = ["מרחב דן", "מרחב שרון", 'מרחב נתב"ג', "מרחב ירקון"]
+
+
+def test_join_key_of_aliased_exact_and_unmatched_names():
+    names = pd.Series(
+        ["מרחב דן תא", "מרחב שרון", " מרחב שרון ", "מרחב נתבג מרכז", "כל הארץ", "כל הארץ", "", None],
+        index=range(10, 18),
+    )
+
+    key, unmatched = merhav_join_key(names, MAP_NAMES)
+
+    assert key.index.equals(names.index)
+    assert key.iloc[:4].tolist() == ["מרחב דן", "מרחב שרון", "מרחב שרון", 'מרחב נתב"ג']
+    assert key.iloc[4:].isna().all()
+    # record counts of the names without a match, missing names are not reported
+    assert unmatched == {"כל הארץ": 2, "": 1}
+
+
+def test_dataset_sums_the_unmatched_names_over_the_years():
+    partitions = [
+        (2023, pd.DataFrame({
+            "StatisticGroup": ["a", "a", "b", "a"],
+            "Year": 2023,
+            "PoliceMerhav": ["מרחב דן תא", "מרחב דן תא", "מרחב ירקון תא", "כל הארץ"],
+        })),
+        (2024, pd.DataFrame({
+            "StatisticGroup": ["a", "b"],
+            "Year": 2024,
+            "PoliceMerhav": ["מרחב דן תא", "מרחב לא קיים"],
+        })),
+    ]
+
+    dataset, unmatched = build_heatmap_dataset(partitions, MAP_NAMES)
+
+    counts = dataset.set_index(["StatisticGroup", "Year", "MerhavName"])["Count"]
+    assert counts.to_dict() == {("a", 2023, "מרחב דן"): 2, ("b", 2023, "מרחב ירקון"): 1, ("a", 2024, "מרחב דן"): 1}
+    assert unmatched == {"כל הארץ": 1, "מרחב לא קיים": 1}
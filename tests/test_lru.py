@@ -0,0 +1,96 @@
+import threading
+
+import pytest
+
+from lru import LRUCache
+
+
+def test_least_recently_used_is_evicted():
+    cache = LRUCache(2)
+    cache.get_or_create("a", lambda: 1)
+    cache.get_or_create("b", lambda: 2)
+    assert cache.get_or_create("a", lambda: -1) == 1  # a is now the most recent
+    cache.get_or_create("c", lambda: 3)
+
+    assert len(cache) == 2
+    assert cache.get_or_create("a", lambda: -1) == 1
+    assert cache.get_or_create("b", lambda: 20) == 20  # b was evicted
+    assert (cache.hits, cache.misses) == (2, 4)
+
+
+def test_size_zero_keeps_nothing():
+    cache = LRUCache(0)
+    assert cache.get_or_create("a", lambda: 1) == 1
+    assert cache.get_or_create("a", lambda: 2) == 2
+    assert len(cache) == 0
+
+
+def test_clear():
+    cache = LRUCache(2)
+    cache.get_or_create("a", lambda: 1)
+    cache.clear()
+    assert cache.get_or_create("a", lambda: 2) == 2
+
+
+def test_concurrent_misses_share_one_creation():
+    cache = LRUCache(4)
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def create():
+        calls.append(1)
+        started.set()
+        release.wait(10)
+        return object()
+
+    results = []
+    first = threading.Thread(target=lambda: results.append(cache.get_or_create("key", create)))
+    first.start()
+    started.wait(5)
+    waiters = [threading.Thread(target=lambda: results.append(cache.get_or_create("key", create))) for _ in range(3)]
+    for thread in waiters:
+        thread.start()
+    # another key is not held up by the slow one
+    other = []
+    thread = threading.Thread(target=lambda: other.append(cache.get_or_create("other", lambda: "fast")))
+    thread.start()
+    thread.join(2)
+    assert other == ["fast"]
+    release.set()
+    for thread in [first] + waiters:
+        thread.join(5)
+
+    assert len(calls) == 1
+    assert len(results) == 4 and all(result is results[0] for result in results)
+    assert (cache.hits, cache.misses) == (3, 2)
+
+
+def test_failed_creation_is_not_cached():
+    cache = LRUCache(4)
+    started, release = threading.Event(), threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise RuntimeError("boom")
+
+    errors = []
+
+    def get():
+        try:
+            cache.get_or_create("key", fail)
+        except RuntimeError as e:
+            errors.append(e)
+
+    first = threading.Thread(target=get)
+    first.start()
+    started.wait(5)
+    waiter = threading.Thread(target=get)
+    waiter.start()
+    release.set()
+    first.join(5)
+    waiter.join(5)
+
+    # the waiter gets the error of the creation it waited for
+    assert len(errors) == 2
+    assert cache.get_or_create("key", lambda: 1) == 1
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+from crime_data import PERIOD_AFTER, PERIOD_BEFORE, finalize, prepare_year
+from cube import build_cube
+from october7_data import ALL_DISTRICTS, district_counts
+
+# 2023-Q2 has no records: 6 quarters before the 7.10 (2022-Q1 to 2023-Q3) and 3 after (2023-Q4 to 2024-Q2)
+QUARTERS = {2022: ["Q1", "Q2", "Q3", "Q4"], 2023: ["Q1", "Q3", "Q4"], 2024: ["Q1", "Q2"]}
+
+
+def records(year):
+    rows = []
+    for quarter in QUARTERS[year]:
+        rows += [{"Quarter": quarter, "PoliceDistrict": "מחוז תא", "StatisticGroup": "עבירות מרמה"}] * 10
+        rows += [{"Quarter": quarter, "PoliceDistrict": "מחוז צפון", "StatisticGroup": "עבירות תנועה"}] * 5
+    return rows
+
+
+@pytest.fixture(scope="module")
+def data():
+    return finalize(pd.concat([prepare_year(records(year), year) for year in QUARTERS], ignore_index=True))
+
+
+def test_period_quarters_counts_the_quarters_with_data(data):
+    quarters = data.groupby("Period", observed=True)["PeriodQuarters"].unique()
+    assert quarters[PERIOD_BEFORE].tolist() == [6]
+    assert quarters[PERIOD_AFTER].tolist() == [3]
+
+
+def test_normalized_counts_per_quarter(data):
+    counts = district_counts(build_cube(data)).set_index(["Category", "Period", "PoliceDistrict"])
+
+    fraud = counts.loc["עבירות מרמה"]
+    assert fraud.loc[(PERIOD_BEFORE, "מחוז תא"), "Count"] == 60
+    assert fraud.loc[(PERIOD_BEFORE, "מחוז תא"), "NormalizedCount"] == 10
+    assert fraud.loc[(PERIOD_AFTER, "מחוז תא"), "Count"] == 30
+    assert fraud.loc[(PERIOD_AFTER, "מחוז תא"), "NormalizedCount"] == 10
+
+    traffic = counts.loc["עבירות תנועה"]
+    assert traffic.loc[(PERIOD_BEFORE, ALL_DISTRICTS), "NormalizedCount"] == 5
+    assert traffic.loc[(PERIOD_AFTER, "מחוז צפון"), "NormalizedCount"] == 5
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+import requests
+
+import datastore
+from datastore import RESOURCE_IDS, CircuitOpenError
+from parallel_prepare import prepare_all
+
+PAGE_SIZE = 64
+
+
+def test_workers_prepare_like_this_process(stub):
+    serial = prepare_all(base_url=stub.base_url, workers=1, page_size=PAGE_SIZE)
+    pooled = prepare_all(base_url=stub.base_url, workers=2, page_size=PAGE_SIZE)
+
+    assert sorted(pooled) == sorted(serial)
+    for year in serial:
+        pd.testing.assert_frame_equal(pooled[year], serial[year])
+
+
+def test_failures_of_the_workers_reach_the_breakers(stub, caplog):
+    resource_id = RESOURCE_IDS[2024]
+    stub.failing[resource_id] = 404
+    with pytest.raises(requests.HTTPError):
+        prepare_all(base_url=stub.base_url, workers=2, page_size=PAGE_SIZE)
+    # failed in a worker, not in this process after the pool broke
+    assert "workers died" not in caplog.text
+    assert datastore.breaker(resource_id).failures == 1
+    assert datastore.degraded() == [2024]
+
+    del stub.failing[resource_id]
+    prepare_all(base_url=stub.base_url, workers=2, page_size=PAGE_SIZE)
+    assert datastore.breaker(resource_id).failures == 0
+    assert datastore.degraded() == []
+
+
+def test_open_circuit_fails_before_the_workers_start(stub):
+    resource_id = RESOURCE_IDS[2020]
+    for _ in range(datastore.FAILURE_THRESHOLD):
+        datastore.breaker(resource_id).record_failure()
+    before = stub.requests
+    with pytest.raises(CircuitOpenError):
+        prepare_all(base_url=stub.base_url, workers=2, page_size=PAGE_SIZE)
+    assert stub.requests == before
@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+from query_service import QueryService, normalize_query
+
+
+def test_filters_are_sorted_and_deduplicated():
+    by, filters = normalize_query(["Year", "Category"], {"Year": [2024, 2023, 2024], "Category": "b"})
+    assert by == ("Year", "Category")
+    assert filters == (("Category", ("b",)), ("Year", (2023, 2024)))
+
+
+def test_equal_queries_have_equal_keys():
+    assert normalize_query(["Year"], {"Year": ["2024", "2023"], "PoliceDistrict": ("x", "y")}) == \
+        normalize_query(["Year", "Year"], {"PoliceDistrict": ["y", "x", "x"], "Year": [2023, 2024]})
+
+
+def test_scalar_is_a_list_of_one():
+    assert normalize_query(["Year"], {"Year": 2023}) == normalize_query(["Year"], {"Year": ["2023"]})
+
+
+def test_text_years_are_numbers():
+    _, filters = normalize_query(["Category"], {"Year": ["2023"]})
+    assert filters == (("Year", (2023,)),)
+
+
+@pytest.mark.parametrize("by, filters", [([], {}), (["Nope"], {}), (["Year"], {"Nope": 1})])
+def test_invalid_queries(by, filters):
+    with pytest.raises(ValueError):
+        normalize_query(by, filters)
+
+
+class FakeVersion:
+    def __init__(self, version, cube):
+        self.version = version
+        self._cube = cube
+        self.cube_calls = 0
+
+    def cube(self):
+        self.cube_calls += 1
+        return self._cube
+
+
+def test_results_are_cached_per_version():
+    cube = pd.DataFrame({"Year": [2023, 2023, 2024], "Category": ["a", "b", "a"], "Count": [1, 2, 3]})
+    current = FakeVersion("v1", cube)
+    service = QueryService(lambda: current)
+
+    first = service.query(["Year"], Year=["2023", "2024"])
+    assert first["Count"].tolist() == [3, 3]
+    service.query(["Year"], Year=[2024, 2023])
+    assert current.cube_calls == 1
+
+    current = FakeVersion("v2", cube.assign(Count=cube["Count"] * 10))
+    assert service.query(["Year"], Year=[2024, 2023])["Count"].tolist() == [30, 30]
+    assert service.version() == "v2"
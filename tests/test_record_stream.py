@@ -0,0 +1,93 @@
+import json
+
+import pandas as pd
+import pytest
+
+from datastore_stub import synthetic_frame
+from record_stream import RecordStream, read_response
+
+CHUNK_SIZES = [1, 2, 3, 7, 64, 4096, 2 ** 20]
+
+
+def chunked(payload, size):
+    return (payload[i:i + size] for i in range(0, len(payload), size))
+
+
+def body(records, **result):
+    return {
+        "help": "datastore_search",
+        "success": True,
+        "result": {"resource_id": "r", "records": records, "offset": 0, "total": len(records), **result},
+    }
+
+
+@pytest.fixture(scope="module")
+def records():
+    # Hebrew names, so the 1 byte chunks split the UTF-8 characters
+    return synthetic_frame(120, 2023).to_dict("records")
+
+
+def encode(response, indent=None):
+    return json.dumps(response, ensure_ascii=False, default=int, indent=indent).encode("utf-8")
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+@pytest.mark.parametrize("indent", [None, 2])
+def test_records_at_any_chunk_size(records, size, indent):
+    response = body(records)
+    stream = RecordStream(chunked(encode(response, indent), size))
+
+    decoded = [record for batch in stream.batches(50) for record in batch]
+
+    assert decoded == json.loads(encode(response))["result"]["records"]
+    assert stream.response == json.loads(encode(body([], total=len(records))))
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_batch_sizes(records, size):
+    batches = list(RecordStream(chunked(encode(body(records)), size)).batches(50))
+    assert [len(batch) for batch in batches] == [50, 50, 20]
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_empty_records(size):
+    stream = RecordStream(chunked(encode(body([])), size))
+    assert list(stream.batches()) == []
+    assert stream.response["result"]["total"] == 0
+
+
+@pytest.mark.parametrize("size", CHUNK_SIZES)
+def test_error_body(size):
+    error = {"success": False, "error": {"message": "Not found: Resource was not found.", "__type": "Not Found Error"}}
+    stream = RecordStream(chunked(encode(error), size))
+    assert list(stream.batches()) == []
+    assert stream.response == error
+
+
+def test_empty_body():
+    stream = RecordStream([])
+    with pytest.raises(ValueError):
+        list(stream.batches())
+
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_truncated_body(records, size):
+    payload = encode(body(records))
+    stream = RecordStream(chunked(payload[:len(payload) // 2], size))
+    with pytest.raises(ValueError):
+        list(stream.batches())
+
+
+@pytest.mark.parametrize("size", [1, 4096])
+def test_read_response(records, size):
+    response = read_response(chunked(encode(body(records)), size), batch_size=50)
+
+    frame = response["result"]["records"]
+    assert isinstance(frame, pd.DataFrame)
+    assert frame["_id"].tolist() == [record["_id"] for record in records]
+    assert response["result"]["total"] == len(records)
+
+
+def test_read_response_of_an_error():
+    error = {"success": False, "error": {"message": "Service unavailable"}}
+    assert read_response([encode(error)]) == error
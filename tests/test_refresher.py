@@ -0,0 +1,93 @@
+import pytest
+
+import datastore
+import snapshot_store
+from datastore import RESOURCE_IDS
+from datastore_stub import synthetic_frame
+from refresher import Refresher
+
+from conftest import ROWS_PER_YEAR
+
+
+@pytest.fixture
+def refresher(stub, snapshot_root):
+    refresher = Refresher(interval=0, root=snapshot_root, base_url=stub.base_url)
+    refresher.current()
+    return refresher
+
+
+def records(refresher):
+    """
+    :return: the number of records of the current version, the uncategorized ones included
+    """
+    return len(snapshot_store.load_snapshot(refresher.current().version, refresher.root))
+
+
+def append(stub, year, rows, seed=5):
+    start_id = len(stub.resources[RESOURCE_IDS[year]]) + 1
+    stub.append(RESOURCE_IDS[year], synthetic_frame(rows, year, seed=seed, start_id=start_id).to_dict("records"))
+
+
+def test_first_version_is_downloaded(stub, refresher):
+    assert refresher.current().version == snapshot_store.current_version(refresher.root)
+    assert records(refresher) == len(RESOURCE_IDS) * ROWS_PER_YEAR
+
+
+def test_refresh_swaps_in_a_new_version(stub, refresher):
+    first = refresher.current()
+    first.cube()
+    assert not refresher.refresh()
+    assert refresher.current() is first
+    assert refresher.last_check is not None
+
+    append(stub, 2024, 25)
+    assert refresher.refresh()
+
+    current = refresher.current()
+    assert current.version != first.version
+    # the tables the pages used are built before the swap, the records are not kept
+    assert "cube" in current.derived_names
+    assert "data" not in current.derived_names
+    assert records(refresher) == len(RESOURCE_IDS) * ROWS_PER_YEAR + 25
+    assert refresher.last_error is None
+    assert not refresher.degraded
+
+
+def test_failing_resource_degrades_and_recovers(stub, refresher):
+    stub.failing[RESOURCE_IDS[2024]] = 404
+    append(stub, 2023, 25)
+
+    assert refresher.refresh()
+    assert refresher.degraded
+    assert refresher.stale_years == [2024]
+    assert refresher.last_error is None
+    assert records(refresher) == len(RESOURCE_IDS) * ROWS_PER_YEAR + 25
+
+    del stub.failing[RESOURCE_IDS[2024]]
+    append(stub, 2024, 10)
+    assert refresher.refresh()
+    assert not refresher.degraded
+    assert refresher.stale_years == []
+    assert records(refresher) == len(RESOURCE_IDS) * ROWS_PER_YEAR + 35
+
+
+def test_open_circuit_keeps_serving(stub, refresher):
+    first = refresher.current()
+    stub.failing[RESOURCE_IDS[2024]] = 404
+    for _ in range(datastore.FAILURE_THRESHOLD):
+        refresher.refresh()
+    assert datastore.breaker(RESOURCE_IDS[2024]).state == "open"
+
+    before = stub.requests
+    refresher.refresh()
+    # the open circuit answers without a request to the resource
+    assert stub.requests - before == 2 * (len(RESOURCE_IDS) - 1)
+    assert refresher.degraded
+    assert refresher.current() is first
+
+    del stub.failing[RESOURCE_IDS[2024]]
+    datastore.breaker(RESOURCE_IDS[2024]).reset_timeout = 0
+    refresher.refresh()
+    assert datastore.breaker(RESOURCE_IDS[2024]).state == "closed"
+    assert not refresher.degraded
+    assert records(refresher) == len(RESOURCE_IDS) * ROWS_PER_YEAR
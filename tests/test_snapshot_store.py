@@ -0,0 +1,92 @@
+import pytest
+
+import snapshot_store
+from datastore import RESOURCE_IDS
+from datastore_stub import synthetic_frame
+
+from conftest import ROWS_PER_YEAR
+
+PAGE_SIZE = 50
+
+
+def stub_ids(stub, year):
+    return sorted(record["_id"] for record in stub.resources[RESOURCE_IDS[year]])
+
+
+@pytest.fixture
+def published(stub, snapshot_root):
+    return snapshot_store.refresh(snapshot_root, base_url=stub.base_url, page_size=PAGE_SIZE)
+
+
+def test_unchanged_resources_are_reused(stub, snapshot_root, published):
+    before = stub.requests
+    assert snapshot_store.update(snapshot_root, base_url=stub.base_url, page_size=PAGE_SIZE) == published
+    # one resource_show and one total per resource, no records
+    assert stub.requests - before == 2 * len(RESOURCE_IDS)
+
+
+def test_appended_rows_are_fetched_alone(stub, snapshot_root, published):
+    rows = synthetic_frame(30, 2023, seed=5, start_id=ROWS_PER_YEAR + 1).to_dict("records")
+    stub.append(RESOURCE_IDS[2023], rows)
+    before = stub.requests
+
+    version = snapshot_store.update(snapshot_root, base_url=stub.base_url, page_size=PAGE_SIZE)
+
+    assert version != published
+    assert stub.requests - before == 2 * len(RESOURCE_IDS) + 1
+    manifest = snapshot_store.read_manifest(root=snapshot_root)
+    assert manifest["changed"] == [2023]
+    partitions = snapshot_store.read_partitions(root=snapshot_root)
+    assert sorted(partitions[2023]["_id"]) == stub_ids(stub, 2023)
+    assert len(partitions[2024]) == ROWS_PER_YEAR
+
+
+def test_failing_resource_is_kept_stale(stub, snapshot_root, published):
+    stub.failing[RESOURCE_IDS[2024]] = 404
+    stub.append(RESOURCE_IDS[2024], synthetic_frame(10, 2024, seed=5, start_id=ROWS_PER_YEAR + 1).to_dict("records"))
+    stub.append(RESOURCE_IDS[2022], synthetic_frame(10, 2022, seed=5, start_id=ROWS_PER_YEAR + 1).to_dict("records"))
+
+    snapshot_store.update(snapshot_root, base_url=stub.base_url, page_size=PAGE_SIZE)
+
+    manifest = snapshot_store.read_manifest(root=snapshot_root)
+    assert manifest["changed"] == [2022]
+    partitions = snapshot_store.read_partitions(root=snapshot_root)
+    assert len(partitions[2024]) == ROWS_PER_YEAR
+    assert len(partitions[2022]) == ROWS_PER_YEAR + 10
+
+
+def test_shrunk_resource_is_downloaded_again(stub, snapshot_root, published):
+    resource_id = RESOURCE_IDS[2021]
+    stub.resources[resource_id] = stub.resources[resource_id][:-15]
+    stub.append(resource_id, [])
+
+    snapshot_store.update(snapshot_root, base_url=stub.base_url, page_size=PAGE_SIZE)
+
+    manifest = snapshot_store.read_manifest(root=snapshot_root)
+    assert manifest["changed"] == [2021]
+    partitions = snapshot_store.read_partitions(root=snapshot_root)
+    assert sorted(partitions[2021]["_id"]) == stub_ids(stub, 2021)
+
+
+def test_deleted_and_appended_rows_are_downloaded_again(stub, snapshot_root, published):
+    resource_id = RESOURCE_IDS[2022]
+    # more rows appended than deleted, the total grows though the old rows are not all there
+    stub.resources[resource_id] = stub.resources[resource_id][20:]
+    stub.append(resource_id, synthetic_frame(30, 2022, seed=5, start_id=ROWS_PER_YEAR + 1).to_dict("records"))
+
+    snapshot_store.update(snapshot_root, base_url=stub.base_url, page_size=PAGE_SIZE)
+
+    partitions = snapshot_store.read_partitions(root=snapshot_root)
+    assert sorted(partitions[2022]["_id"]) == stub_ids(stub, 2022)
+    assert len(partitions[2022]) == ROWS_PER_YEAR + 10
+
+
+def test_old_versions_are_pruned(stub, snapshot_root, published):
+    for i in range(snapshot_store.KEEP_VERSIONS + 1):
+        start_id = ROWS_PER_YEAR + 1 + 5 * i
+        stub.append(RESOURCE_IDS[2020], synthetic_frame(5, 2020, seed=i, start_id=start_id).to_dict("records"))
+        version = snapshot_store.update(snapshot_root, base_url=stub.base_url, page_size=PAGE_SIZE)
+
+    versions = snapshot_store.list_versions(snapshot_root)
+    assert len(versions) == snapshot_store.KEEP_VERSIONS
+    assert versions[-1] == version
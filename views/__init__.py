@@ -0,0 +1,4 @@
+"""
+The dashboard pages. main.py imports a page module only when it is selected, and each page defers
+its plotting libraries to the functions that build a figure on a cache miss.
+"""
@@ -0,0 +1,250 @@
+"""
+Employment page: employment rate against crime per 1,000 residents, by Police district and year.
+"""
+from functools import lru_cache
+
+import numpy as np
+import streamlit as st
+
+from figures import chart_specs, figure_from_spec, trace_visibility
+from instrumentation import span
+from loaders import load_data_version, load_district_facts
+
+# Correct bin definitions and labels
+BINS = (0, 1000, 2500, 4000, 6000, float("inf"))
+LABELS = ("0-1000", "1000-2500", "2500-4000", "4000-6000", "6000+")
+MIN_LEGEND_SIZE = 200  # smallest bubble of the legend, in crime rate units
+
+
+@lru_cache(maxsize=None)
+def size_legend(bins=BINS, labels=LABELS, min_size=MIN_LEGEND_SIZE):
+    """
+    One bubble per bin, sized by the middle of the bin (the lower edge of the open last bin). Depends
+    on the bin definitions only, so it is computed once.
+    :param bins: tuple of bin edges
+    :param labels: tuple of bin labels, one less than the edges
+    :param min_size: smallest bubble size
+    :return: (tuple of labels, tuple of bubble sizes)
+    """
+    edges = np.asarray(bins, dtype=float)
+    lower, upper = edges[:-1], edges[1:]
+    middle = np.where(np.isfinite(upper), (lower + upper) / 2, lower)
+    return tuple(labels), tuple(np.maximum(middle, min_size).tolist())
+
+
+@lru_cache(maxsize=None)
+def legend_annotations(labels=LABELS):
+    """
+    :param labels: tuple of bin labels
+    :return: tuple of the annotations naming every legend bubble
+    """
+    return tuple(
+        dict(x=0.95, y=label, xref="paper", yref="y2", text=label, showarrow=False,
+             font=dict(size=12, color="black"), xanchor="center", yanchor="middle")
+        for label in labels
+    )
+
+
+def render():
+    st.markdown("""
+        <style>
+        .checkbox-label {
+            display: flex;
+            align-items: center;
+            gap: 1000px;  /* Adjust the gap between checkbox and text */
+        }
+        .stCheckbox>div {
+            display: flex;
+            align-items: center;
+            gap: 1000px; /* Adjust padding between Streamlit checkbox and text */
+        }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # crime counts, employment rate and population per district and year, joined once per data version
+    with span("employment.load"):
+        facts = load_district_facts()
+
+    # Streamlit app
+    st.title("ניתוח מגמות שיעור התעסוקה ונתוני פשיעה במחוזות שונים")
+    st.markdown("""
+    <style>
+    .paragraph-with-padding {
+        padding-bottom: 75px;
+        padding-top: 50px;
+    }
+    </style>
+
+    <div class="paragraph-with-padding">
+    .בגרף זה ניתן לראות את הקשר בין שיעור התעסוקה וכמות הפשיעה לאורך השנים במחוזות המשטרה השונים שנבחרו<br>
+    .גודל הנקודות מייצג את שיעור הפשיעה ל-1,000 תושבים, בעוד שהציר האנכי מראה את אחוז התעסוקה בכל מחוז<br>
+    .ניתן להשתמש בתצוגה זו כדי לזהות תבניות או שינויים שחלו במהלך השנים במחוזות השונים
+    </div>
+    """, unsafe_allow_html=True)
+
+    # User selects Police District(s) with checkboxes
+
+    st.markdown("""
+        <style>
+        /* Adjust Streamlit checkbox layout */
+        .stCheckbox > label {
+            display: flex;
+            align-items: center;
+            gap: 15px;  /* Adjust this value to control the spacing */
+        }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # the districts with crime records
+    police_districts = sorted(facts.index[facts["Crime Count"] > 0].get_level_values("PoliceDistrict").unique())
+    selected_districts = []
+
+    # Layout for checkboxes and plot alignment
+    col1, col2 = st.columns([8, 1])  # Adjust the ratio for better alignment
+
+    with col2:
+        st.markdown(
+            "<h5 style='text-align: right; font-size: 18px;'>:בחר מחוזות</h5>",
+            unsafe_allow_html=True
+        )
+        for district in police_districts:
+            if st.checkbox(district, value=True):
+                selected_districts.append(district)
+
+    # Filter data based on selected Police District(s)
+    filtered_data = facts.loc[selected_districts]
+
+    fixed_colors = {
+        "מחוז דרומי": "#1f77b4",  # Example color (blue)
+        "מחוז חוף": "#ff7f0e",  # Example color (orange)
+        "מחוז ירושלים": "#2ca02c",  # Example color (green)
+        "מחוז מרכז": "#d62728",  # Example color (red)
+        "מחוז צפון": "#9467bd",  # Example color (purple)
+        "מחוז שי": "#8c564b",  # Example color (brown)
+        "מחוז תא": "#e377c2"  # Example color (pink)
+    }
+    def build_employment_figure():
+        # built once per data version with every district, the checkboxes only toggle their traces
+        import plotly.express as px
+        import plotly.graph_objects as go
+
+        # year by year, so the districts keep the order of their first year on the legend
+        plot_data = facts.loc[police_districts].reset_index().sort_values(["Year", "PoliceDistrict"])
+
+        # Define hover template
+        hover_template = (
+            "<b>מחוז:</b> %{customdata[0]}<br>"
+            "<b>שנה:</b> %{x}<br>"
+            "<b>שיעור תעסוקה:</b> %{y:.1f}%<br>"
+            "<b>כמות פשיעה:</b> %{customdata[1]:,.0f} פשעים ל-1000 אנשים<extra></extra>"
+        )
+
+        # --- Main Plot ---
+        fig_main = px.scatter(
+            plot_data,
+            x="Year",
+            y="EmploymentRate",
+            size="Crime Rate",
+            color="PoliceDistrict",
+            color_discrete_map=fixed_colors,
+            custom_data=["PoliceDistrict", "Crime Rate"],
+            hover_name="PoliceDistrict",
+            size_max=30
+        )
+        fig_main.update_traces(hovertemplate=hover_template)
+
+        # Add trend lines for each district
+        unique_districts = plot_data['PoliceDistrict'].unique()
+        for district in unique_districts:
+            district_data = plot_data[plot_data["PoliceDistrict"] == district].sort_values("Year")
+            fig_main.add_scatter(
+                x=district_data["Year"],
+                y=district_data["EmploymentRate"],
+                mode="lines+markers",
+                line=dict(color=fixed_colors[district], width=2),
+                name=district,
+                showlegend=False,
+                customdata=district_data[["PoliceDistrict", "Crime Rate"]],
+                hovertemplate=hover_template
+            )
+        # --- Size Legend ---
+        # a fixed bubble per bin, the same for any data
+        legend_labels, legend_sizes = size_legend()
+        legend_trace = go.Scatter(
+            x=np.zeros(len(legend_labels)),
+            y=legend_labels,
+            mode="markers",
+            marker=dict(
+                size=legend_sizes,
+                sizemode="area",
+                sizeref=max(legend_sizes) / 30 ** 2,
+                color="grey",
+                line=dict(width=0),  # Remove borders around bubbles
+            ),
+            showlegend=False,
+            hovertemplate="",  # Disable tooltip
+            hoverinfo="none",  # No hover information at all
+            xaxis="x2",
+            yaxis="y2",
+        )
+
+        # --- Combine Main Plot and Legend ---
+        fig_combined = go.Figure(
+            data=[trace for trace in fig_main.data] + [legend_trace],
+            layout=fig_main.layout
+        )
+        # Update layout to address alignment and readability
+        fig_combined.update_layout(
+            xaxis_domain=[0, 0.78],  # Adjust plot area domain to make space for the legend
+            xaxis=dict(
+                tickmode="array",
+                tickvals=[2020, 2021, 2022, 2023],
+                range=[2019.8, 2023.2]
+            ),
+            xaxis2={"domain": [0.8, 0.9], "matches": None, "visible": False},
+            yaxis2={
+                "anchor": "free",
+                "overlaying": "y",
+                "side": "right",
+                "showline": False,
+                "showgrid": False,
+                "visible": False
+            },
+            annotations=list(legend_annotations()),
+            legend_title="מחוזות משטרתיים",
+            title="השפעת שיעור התעסוקה על הפשיעה לאורך השנים",
+            title_x=0.52,
+            xaxis_title="שנה",
+            yaxis_title="(%) שיעור תעסוקה",
+            font=dict(size=12),
+            showlegend=True,
+            margin=dict(l=0, r=30, t=40, b=40)  # Adjust margins to prevent cutoff
+        )
+
+        # Adjust the combined layout for a narrower legend
+        fig_combined.update_layout(
+            xaxis_domain=[0, 0.82],  # Widen the main plot area
+            xaxis2={"domain": [0.83, 0.9], "matches": None, "visible": False},  # Shrink legend width further
+            annotations=list(legend_annotations()),
+            margin=dict(l=40, r=120, t=40, b=40)  # Reduce the right margin to prevent cutoff
+        )
+        return fig_combined
+
+    # Ensure filtered data is not empty before plotting
+    if not filtered_data.empty:
+        with col1:
+            with span("employment.figure"):
+                spec = chart_specs.get_or_build(("employment", load_data_version()), build_employment_figure)
+                updates = trace_visibility(spec, selected_districts, police_districts)
+
+                # bubble sizes are scaled to the largest one shown, like px.scatter does for the data it gets
+                main_sizeref = filtered_data["Crime Rate"].max() / 30 ** 2
+                for i, trace in enumerate(spec["data"]):
+                    # the size legend (on x2) does not depend on the selection
+                    if trace.get("mode") == "markers" and trace.get("xaxis") != "x2":
+                        updates[i] = {**(updates[i] or {}), "marker": {**trace["marker"], "sizeref": main_sizeref}}
+                fig_combined = figure_from_spec(spec, updates)
+
+            # --- Display Plot ---
+            with span("employment.display"):
+                st.plotly_chart(fig_combined, use_container_width=True)
@@ -0,0 +1,151 @@
+"""
+Map page: crime per Police Merhav on a choropleth, by crime type and year.
+"""
+import plotly.express as px
+import streamlit as st
+
+from instrumentation import span
+from loaders import load_heatmap_data, load_merhav_boundaries, load_merhav_geojson
+from shared_data import view
+
+
+def render():
+    # counts per crime type, year and Merhav, already keyed by the map's MerhavName
+    with span("merhav_map.load"):
+        df_all = load_heatmap_data()
+        # reprojected boundaries with clean names and centroids, shared by all sessions
+        gdf = view(load_merhav_boundaries())
+
+    gdf['record_count'] = 0  # Initialize record count for mapping
+
+    # Sort and prepare dropdown options
+    sorted_crimes = ['כל סוגי העבירות'] + sorted(df_all['StatisticGroup'].unique())
+    sorted_merhavim = ['כל המרחבים'] + sorted(gdf['MerhavName'].unique())
+    years = ['לאורך כל השנים', 2020, 2021, 2022, 2023, 2024]
+
+    st.markdown(
+        """
+        <style>
+        /* Align dropdown menus to the right and reduce their width */
+        .stSelectbox > div {
+            direction: rtl; /* Make text right-to-left for Hebrew */
+            text-align: right; /* Align text inside the dropdown */
+            width: 200px; /* Reduce dropdown width */
+            margin-left: auto; /* Push dropdown to the right */
+            margin-right: 0; /* Remove extra margin */
+        }
+
+        /* Align titles and labels to the right */
+        .stText {
+            text-align: right; /* Align Streamlit text elements to the right */
+            direction: rtl; /* Right-to-left direction for Hebrew */
+        }
+        /* Align all text elements (labels, titles) to the right */
+        .stMarkdown, .stSelectbox label {
+            text-align: right; /* Align text to the right */
+            direction: rtl; /* Right-to-left direction for Hebrew */
+        }
+        </style>
+        """,
+        unsafe_allow_html=True
+    )
+
+    # Streamlit layout
+    st.title("מפת חום - עבירות משטרת ישראל")
+    st.markdown("""
+     <div style="text-align: right; direction: rtl; font-size: 18px; line-height: 1.6;">
+     מפת החום מציגה את התפלגות הפשיעה במדינת ישראל בחלוקה לפי מרחבים משטרתיים. 
+     ניתן לראות את המידע בצורה ויזואלית ולהבין אילו מרחבים סובלים יותר מפשיעה, ובאילו סוגי עבירות. 
+
+     באמצעות הכלים האינטראקטיביים בדף זה, תוכלו לסנן את המידע לפי סוג העבירה והשנה המבוקשת, ולבחון את הפערים בין מרחבים שונים. 
+
+     </div>
+     """, unsafe_allow_html=True)
+
+    st.markdown("""
+     <div style="text-align: right; direction: rtl; font-size: 18px; line-height: 1.8;">
+    <h3>מה כוללת כל קטגוריה בגרף?</h3>
+     <ul>
+         <li><strong>עבירות פליליות כלליות:</strong> עבירות כלפי הרכוש, עבירות נגד גוף, עבירות נגד אדם, עבירות מין.</li>
+         <li><strong>עבירות מוסר וסדר ציבורי:</strong> עבירות כלפי המוסר, עבירות סדר ציבורי.</li>
+         <li><strong>עבירות ביטחון:</strong> עבירות ביטחון.</li>
+         <li><strong>עבירות כלכליות ומנהליות:</strong> עבירות כלכליות, עבירות מנהליות, עבירות רשוי.</li>
+         <li><strong>עבירות תנועה:</strong> עבירות תנועה.</li>
+         <li><strong>עבירות מרמה:</strong> עבירות מרמה.</li>
+     </ul>
+     </div>
+     """, unsafe_allow_html=True)
+
+    # Dropdowns for user selection
+    selected_crime = st.selectbox("בחר סוג עבירה:", options=sorted_crimes)
+    selected_year = st.selectbox("בחר שנה:", options=years)
+
+    # Filter data based on selections
+    if selected_crime == 'כל סוגי העבירות':
+        filtered_df = df_all
+    else:
+        filtered_df = df_all[df_all['StatisticGroup'] == selected_crime]
+
+    if selected_year != 'לאורך כל השנים':
+        filtered_df = filtered_df[filtered_df['Year'] == int(selected_year)]
+
+    # Summarize counts by Merhav
+    with span("merhav_map.counts"):
+        merhav_counts = filtered_df.groupby('MerhavName', observed=True)['Count'].sum()
+        gdf['record_count'] = gdf['MerhavName'].map(merhav_counts).fillna(0)
+    with span("merhav_map.geojson"):
+        geojson = load_merhav_geojson()
+
+    with span("merhav_map.figure"):
+        fig = px.choropleth_mapbox(
+            gdf,
+            geojson=geojson,
+            locations='unique_id',
+            color="record_count",
+            hover_name="MerhavName",
+            hover_data={"record_count": True, 'unique_id': False},  # Exclude "unique_id" from tooltips
+            mapbox_style="carto-positron",
+            center={"lat": 31.5, "lon": 34.8},  # Centered on Israel
+            zoom=6.3,  # Adjusted zoom level to fit Israel
+            color_continuous_scale="Reds",
+            title=f"{selected_year} מפת עבירות" if selected_year != 'לאורך כל השנים' else "2020-2024 מפת עבירות",
+            labels={"record_count": "מספר עבירות"}
+        )
+
+        fig.update_traces(
+            reversescale=True  # Set to True if you want to reverse light-to-dark order
+        )
+
+        # Update layout for vertical orientation
+        fig.update_layout(
+            annotations=[
+                dict(
+                    text=f"{selected_year} מפת עבירות" if selected_year != 'לאורך כל השנים' else "2020-2024 מפת עבירות",
+                    x=1,  # Align to the far right
+                    y=1.1,  # Place above the map
+                    xref="paper",  # Use the figure as the reference frame
+                    yref="paper",
+                    showarrow=False,  # No arrow for the annotation
+                    font=dict(size=24, color="black"),
+                    align="right"  # Align the text to the right
+                )
+            ],
+            title_text="",
+            mapbox=dict(
+                center={"lat": 31.5, "lon": 34.8},  # Center on Israel
+                zoom=6.2,  # Zoom out slightly to show entire Israel
+                style="carto-positron"
+            ),
+            height=800,  # Taller map for vertical orientation
+            width=500,
+            title_x=0.4,
+            margin=dict(
+                l=20,  # Left margin
+                r=20,  # Right margin for better alignment
+                t=80,  # Top margin for annotation space
+                b=20  # Bottom margin
+            )
+        )
+    # Display the map
+    with span("merhav_map.display"):
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,171 @@
+"""
+7.10 page: crime per quarter before and after the 7.10.2023, by category and Police district.
+"""
+import streamlit as st
+
+from figures import chart_specs, figure_from_spec
+from instrumentation import span
+from loaders import load_data_version, load_october7_counts
+from october7_data import ALL_DISTRICTS
+
+
+def render():
+    # counts per category, period and district, normalized per quarter, see october7_data.py
+    with span("october7.load"):
+        grouped = load_october7_counts()
+
+    # Define districts
+    districts = sorted(
+        grouped["PoliceDistrict"].unique(),
+        key=lambda x: (x != ALL_DISTRICTS, x)
+    )
+
+    # Title
+    st.markdown(
+        '<h1 style="text-align: right; font-size: 36px; direction: rtl;">התפלגות עבירות לפני ואחרי ה-7.10</h1>',
+        unsafe_allow_html=True
+    )
+
+    st.markdown("""
+    <div style="text-align: right; direction: rtl; font-size: 18px; line-height: 1.6;">
+    הנתונים המוצגים בעמוד זה מתמקדים בהשוואת הפשיעה לפני ואחרי אירועי ה-7 באוקטובר 2023. 
+    
+    הגרף מציג את כמות העבירות המנורמלת לרבעון, תוך חלוקה לסוגי עבירות עיקריים, ומאפשר זיהוי הבדלים במגמות לאורך הזמן. 
+    ניתן לסנן את המידע על פי מחוז משטרתי ולבחון כיצד הושפעו אזורים גיאוגרפיים שונים.
+
+    </div>
+    """, unsafe_allow_html=True)
+
+
+    st.markdown("""
+    <div style="text-align: right; direction: rtl; font-size: 18px; line-height: 1.8;">
+    <h3>מה כוללת כל קטגוריה בגרף?</h3>
+    <ul>
+        <li><strong>עבירות פליליות כלליות:</strong> עבירות כלפי הרכוש, עבירות נגד גוף, עבירות נגד אדם, עבירות מין.</li>
+        <li><strong>עבירות מוסר וסדר ציבורי:</strong> עבירות כלפי המוסר, עבירות סדר ציבורי.</li>
+        <li><strong>עבירות ביטחון:</strong> עבירות ביטחון.</li>
+        <li><strong>עבירות כלכליות ומנהליות:</strong> עבירות כלכליות, עבירות מנהליות, עבירות רשוי.</li>
+        <li><strong>עבירות תנועה:</strong> עבירות תנועה.</li>
+        <li><strong>עבירות מרמה:</strong> עבירות מרמה.</li>
+    </ul>
+    </div>
+    """, unsafe_allow_html=True)
+    st.markdown("""
+        <style>
+        /* Style for the selectbox to reduce its width */
+        div[data-testid="stSelectbox"] > div {
+            width: 150px; /* Set the desired width for the dropdown */
+        }
+
+        /* Align the dropdown content */
+        div[data-testid="stSelectbox"] {
+            text-align: right;
+            direction: rtl;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+    col1, col2 = st.columns([1, 3])  # Adjust the ratio to move the dropdown to the right
+
+    # Place the dropdown and label in the right column
+    with col2:
+        # Label for the dropdown
+        st.markdown("""
+            <div style="text-align: right; direction: rtl; font-size: 18px;">
+                בחר מחוז:
+            </div>
+        """, unsafe_allow_html=True)
+
+        # Dropdown menu
+        selected_district = st.selectbox(
+            "",
+            districts,  # List of districts
+            index=0,  # Default to "כל המחוזות"
+            key="district-selector"
+        )
+
+    def district_pivot(district):
+        # Filter data based on selected district
+        if district == ALL_DISTRICTS:
+            filtered_df = grouped
+        else:
+            filtered_df = grouped[grouped["PoliceDistrict"] == district]
+
+        # Aggregate data
+        aggregated_df = filtered_df.groupby(["Category", "Period"], as_index=False, observed=True)["NormalizedCount"].sum()
+
+        # Pivot the aggregated data
+        pivot_df = (
+            aggregated_df.pivot(index="Category", columns="Period", values="NormalizedCount")
+            .fillna(0)  # Fill missing values with 0
+            .reset_index()
+        )
+
+        # Sort the categories for the bar chart
+        pivot_df = pivot_df.sort_values(by=["לפני ה7.10", "אחרי ה7.10"], ascending=False)
+        return pivot_df
+
+    def build_district_figure(district=ALL_DISTRICTS):
+        # built once per data version, the district selector only swaps the bars and the title
+        import plotly.express as px
+
+        pivot_df = district_pivot(district)
+        return px.bar(
+            pivot_df,
+            x="Category",
+            y=["לפני ה7.10", "אחרי ה7.10"],
+            barmode="group",
+            labels={"value": "כמות עבירות מנורמלת לרבעון", "variable": "", "Category": "קטגוריה"},  # הורדת המילה "תקופה"
+            title=f"פשיעה ב{district}"  # Update title to "פשיעה ב"
+        ).update_layout(
+            xaxis_title="סוגי עבירות",
+            yaxis_title="כמות עבירות מנורמלת לרבעון",
+            legend_title="",  # הסרת כותרת האגדה
+            plot_bgcolor="#f9f9f9",
+            title=dict(
+                text=f"פשיעה ב{district}",  # Update title to "פשיעה ב"
+                x=1,  # Align title to the right
+                xanchor="right",  # Anchor title to the right
+                font=dict(size=28)  # Adjust title font size
+            ),
+            xaxis=dict(
+                tickmode="array",
+                tickvals=pivot_df["Category"].tolist(),
+                ticktext=[
+                    "עבירות פליליות<br>כלליות",
+                    "עבירות מוסר<br>וסדר ציבורי",
+                    "עבירות<br>ביטחון",
+                    "עבירות<br>כלכליות ומנהליות",
+                    "עבירות<br>מרמה",
+                    "עבירות<br>תנועה"
+                ],
+                tickfont=dict(size=18),  # גודל הטקסט של הקטגוריות בציר X
+                title_font=dict(size=20)  # גודל הטקסט של כותרת ציר X
+            ),
+            yaxis=dict(
+                tickfont=dict(size=18),  # גודל הטקסט של המספרים בציר Y
+                title_font=dict(size=20),  # גודל הטקסט של כותרת ציר Y
+                gridcolor="lightgrey",  # צבע קווים חלש יותר
+                gridwidth=0.5  # עובי קווים דק יותר
+            ),
+            legend=dict(
+                font=dict(size=18)  # גודל הטקסט של האגדה (legend)
+            ),
+            height=700  # Increase height for better visualization
+        )
+
+    with span("october7.figure"):
+        pivot_df = district_pivot(selected_district)
+        spec = chart_specs.get_or_build(("oct7", load_data_version()), build_district_figure)
+        layout = spec["layout"]
+        fig = figure_from_spec(
+            spec,
+            [{"x": pivot_df["Category"].to_numpy(), "y": pivot_df[trace["name"]].to_numpy()} for trace in spec["data"]],
+            {
+                "title": {**layout["title"], "text": f"פשיעה ב{selected_district}"},
+                "xaxis": {**layout["xaxis"], "tickvals": pivot_df["Category"].tolist()},
+            },
+        )
+
+    # Display bar chart
+    with span("october7.display"):
+        st.plotly_chart(fig, use_container_width=True)
@@ -0,0 +1,311 @@
+"""
+Overview page: crime counts per category, by year and quarter, and the trends over time.
+"""
+import pandas as pd
+import streamlit as st
+
+from crime_data import reverse_labels
+from figures import chart_specs, figure_from_spec, overview_figures, trace_visibility
+from instrumentation import span
+from loaders import load_cube, load_data_version, query_service
+
+
+def render():
+    st.title("פשיעה במדינת ישראל בשנים 2020-2024")
+
+    st.markdown("""
+    <div style="text-align: right; direction: rtl; font-size: 18px; line-height: 1.6;">
+    ברוכים הבאים לדף לניתוח ויזואלי של נתוני הפשיעה במדינת ישראל בין השנים 2020–2024. 
+    דף זה נועד להציג תובנות ומגמות מתוך נתוני הפשיעה, תוך חלוקה לסוגי עבירות, מחוזות גיאוגרפיים והשפעתם של אירועים מרכזיים.
+
+    באמצעות כלי ניתוח אינטראקטיביים, תוכלו לבחון את ההתפלגויות השונות, להשוות בין תקופות זמן ולגלות תובנות חדשות על השינויים שחלו לאורך השנים. 
+    אנו מזמינים אתכם להשתמש בממשק זה לחקירה מעמיקה של נתוני הפשיעה בישראל ולקבלת תמונה רחבה ומדויקת יותר על הנושא.
+    </div>
+    """, unsafe_allow_html=True)
+
+    st.markdown("""
+    <div style="text-align: right; direction: rtl; font-size: 18px; line-height: 1.8;">
+    <h3>מה כוללת כל קטגוריה בגרף?</h3>
+    <ul>
+        <li><strong>עבירות פליליות כלליות:</strong> עבירות כלפי הרכוש, עבירות נגד גוף, עבירות נגד אדם, עבירות מין.</li>
+        <li><strong>עבירות מוסר וסדר ציבורי:</strong> עבירות כלפי המוסר, עבירות סדר ציבורי.</li>
+        <li><strong>עבירות ביטחון:</strong> עבירות ביטחון.</li>
+        <li><strong>עבירות כלכליות ומנהליות:</strong> עבירות כלכליות, עבירות מנהליות, עבירות רשוי.</li>
+        <li><strong>עבירות תנועה:</strong> עבירות תנועה.</li>
+        <li><strong>עבירות מרמה:</strong> עבירות מרמה.</li>
+    </ul>
+    </div>
+    """, unsafe_allow_html=True)
+
+    with span("overview.load"):
+        cube = load_cube()
+        queries = query_service()
+    # OVERVIEW VISUALIZATION
+    # Determine Y-axis max value before filtering
+    years = ["כל השנים"] + sorted(cube["Year"].dropna().unique().astype(int).tolist())
+    st.markdown("""
+        <style>
+        /* Align the selectbox text and menu to the right */
+        div[data-testid="stSelectbox"] * {
+            text-align: right !important; /* Align all text inside the dropdown */
+            direction: rtl !important;   /* Force right-to-left text direction */
+        }
+
+        /* Set a shorter width for the selectbox */
+        div[data-testid="stSelectbox"] > div {
+            width: 200px; 
+        }
+
+        /* Align the dropdown to the right */
+        div[data-testid="stSelectbox"] {
+            text-align: right;
+            direction: rtl;
+        }
+
+        /* Align checkbox text */
+        div[data-testid="stCheckbox"] * {
+            text-align: right !important;
+            direction: rtl !important;
+            padding-right: 2.5px !important; /* Add space before the text */
+
+
+        }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Sidebar filters
+    year_selected = st.selectbox("בחר שנה:", years, index=0)
+
+    split_by_quarter = st.checkbox("חלוקה לרבעונים")
+
+    def draw_overview():
+        # only runs when this (data, year, quarter split) was not rendered yet, see figures.py
+        import seaborn as sns
+        from matplotlib.figure import Figure
+
+        # Filter data based on selected year
+        year_filter = {} if year_selected == "כל השנים" else {"Year": int(year_selected)}
+        present_categories = queries.query(["Category"])["Category"]
+        crime_counts = (
+            queries.query(["Category"], **year_filter)
+            .set_index("Category")["Count"]
+            .reindex(present_categories, fill_value=0)
+        )
+        # matplotlib draws Hebrew left to right, so the labels are reversed on the category table only
+        crime_counts.index = [category[::-1] for category in crime_counts.index]
+
+        # Sort categories by total count
+        unique_categories = crime_counts.sort_values(ascending=False).index.tolist()
+
+        ticktext = [
+            "\u202Bכלליות\nעבירות פליליות",
+            "\u202Bוסדר ציבורי\nעבירות מוסר",
+            "\u202Bביטחון\nעבירות",
+            "\u202Bכלכליות ומנהליות\nעבירות",
+            "\u202Bמרמה\nעבירות",
+            "\u202Bתנועה\nעבירות"
+        ]
+
+        ticktext = [text[::-1] for text in ticktext]
+
+        fixed_y_max = 18000  # Set this to an appropriate value for your dataset
+
+        # Generate plot
+        fig = Figure(figsize=(4, 2))  # Set the size smaller here
+        ax = fig.subplots()
+
+        if split_by_quarter:
+            grouped_data = queries.query(["Category", "Quarter"], **year_filter).rename(columns={"Count": "Counts"})
+            # Ensure consistent ordering by converting to categorical
+            grouped_data["ReversedStatisticGroup"] = pd.Categorical(
+                reverse_labels(grouped_data["Category"]), categories=unique_categories, ordered=True
+            )
+            if year_selected == "כל השנים":
+                max_y = grouped_data["Counts"].max()
+            else:
+                max_y = 6000
+
+            sns.barplot(
+                data=grouped_data,
+                x="ReversedStatisticGroup",
+                y="Counts",
+                hue="Quarter",
+                palette=["#FF5733", "#FFC300", "#28B463", "#1E90FF"],
+                order=unique_categories,
+                ax=ax,
+                zorder=2,
+                width=0.6
+            )
+            ax.legend(title="ןועבר", fontsize=4, title_fontsize=4)
+            ax.set_title("םינועבר יפל תוריבע תומכ", fontsize=6, pad=10, ha='right')
+
+            if year_selected == "כל השנים":
+                ax.set_ylim(0, max_y + (0.1 * max_y))
+            else:
+                ax.set_ylim(0, 6000)
+            ax.tick_params(axis='y', labelsize=5)  # Change '6' to your desired font size
+            ax.set_xlabel("עשפה גוס", fontsize=6)
+            ax.set_ylabel("תוריבעה תומכ", fontsize=6)
+            ax.set_xticks(range(len(ticktext)))
+            ax.set_xticklabels(ticktext, rotation=0, ha='center', fontsize=5)
+            ax.grid(axis='y', color='lightgrey', linewidth=0.5, zorder=0)
+
+        else:
+            crime_counts = crime_counts.reindex(unique_categories, fill_value=0)
+            crime_counts.index = ticktext
+
+            if year_selected == "כל השנים":
+                max_y = crime_counts.max()
+                ax.set_ylim(0, max_y + (0.1 * max_y))
+            else:
+                max_y = fixed_y_max
+                ax.set_ylim(0, fixed_y_max)
+
+            crime_counts.plot(kind="bar", ax=ax, color='orange', zorder=2)
+
+            ax.tick_params(axis='y', labelsize=4)  # Change '6' to your desired font size
+            ax.set_xticks(range(len(ticktext)))
+            ax.set_xticklabels(ticktext, rotation=0, ha='center', fontsize=4)
+            ax.set_xlabel("עשפה גוס", fontsize=6)
+            ax.set_ylabel("תוריבעה תומכ", fontsize=6)
+
+            ax.set_title("תוריבע יגוס תוגלפתה", fontsize=6, pad=10)
+            ax.grid(axis='y', color='lightgrey', linewidth=0.5)
+
+
+
+        fig.tight_layout(pad=0.5, h_pad=0.2, w_pad=0.2)
+        return fig
+
+    with span("overview.bar_chart"):
+        png = overview_figures.get_or_render((load_data_version(), year_selected, split_by_quarter), draw_overview)
+    with span("overview.bar_chart_display"):
+        st.image(png, use_container_width=False)
+
+    ### next visualization
+    # Visualization
+    st.markdown("""
+     ### מגמות פשיעה לאורך זמן
+     .הגרף מציג את מגמות הפשיעה לאורך זמן בחלוקה לפי רבעונים. ניתן לסנן את סוגי העבירות בעזרת התיבות בצד ימין
+     """, unsafe_allow_html=True)
+    # Preprocess Data
+    with span("overview.trends_rollup"):
+        df = queries.query(["YearQuarter", "Category"])  # rows without a valid quarter have no YearQuarter
+    df['Category'] = df['Category'].astype(str)  # alphabetical legend, like the checkboxes
+
+    # Add CSS to reduce checkbox size and padding
+    st.markdown("""
+        <style>
+            /* Reduce padding, margins, and font size for checkboxes */
+            div[data-testid="stCheckbox"] > div {
+                padding: 2px !important;
+                margin: 0px !important;
+            }
+
+            div[data-testid="stCheckbox"] label {
+                font-size: 4px !important;  /* Smaller font size */
+            }
+        </style>
+    """, unsafe_allow_html=True)
+
+    # Adjust column ratio to make the plot area larger
+    col1, col2 = st.columns([6, 1], gap="medium")  # Increase plot area width
+    crime_types = sorted(df['Category'].dropna().unique())
+
+    with col2:
+        st.markdown("##### :בחר סוגי עבירות")
+        selected_crime_types = []
+        with st.container():
+            for crime in crime_types:
+                if st.checkbox(crime, value=True, key=f"checkbox_{crime}"):
+                    selected_crime_types.append(crime)
+
+    def build_trends_figure():
+        # built once per data version with every category, the checkboxes only toggle the traces
+        import plotly.express as px
+
+        # Aggregate data for visualization
+        agg_df = (
+            df.groupby(['YearQuarter', 'Category'], observed=True)['Count']
+            .sum()
+            .reset_index()
+        )
+
+        # Ensure all quarters are displayed
+        unique_quarters = sorted(df['YearQuarter'].unique())
+        agg_df['YearQuarter'] = pd.Categorical(agg_df['YearQuarter'], categories=unique_quarters, ordered=True)
+
+        color_map = {
+            "עבירות פליליות כלליות": "#2ca02c",  # Green
+            "עבירות מוסר וסדר ציבורי": "#ff7f0e",  # Orange
+            "עבירות ביטחון": "#1f77b4",  # Blue
+            "עבירות כלכליות ומנהליות": "#d62728",  # Red
+            "עבירות תנועה": "#9467bd",  # Purple
+            "עבירות מרמה": "#8c564b"  # Brown
+        }
+
+        fig = px.line(
+            agg_df,
+            x='YearQuarter',
+            y='Count',
+            color='Category',
+            title="מגמות פשיעה לפי סוגי עבירות",
+            labels={
+                'YearQuarter': 'רבעון',
+                'Count': 'מספר עבירות',
+                'Category': 'סוג עבירה'
+            }
+        )
+
+        # Apply fixed colors
+        fig.for_each_trace(lambda trace: trace.update(line_color=color_map[trace.name]))
+
+        # Add vertical line and annotation for "2023-Q4" if present
+        q4_index = unique_quarters.index("2023-Q4") if "2023-Q4" in unique_quarters else None
+        if q4_index is not None:
+            fig.add_vline(
+                x="2023-Q4",
+                line_dash="dash",
+                line_color="gray",
+            )
+            fig.add_annotation(
+                x="2023-Q4",
+                y=1.02,
+                text="השבעה באוקטובר",
+                showarrow=False,
+                font=dict(size=14, color="gray"),
+                align="center",
+                xanchor="center",
+                yanchor="bottom",
+                yref="paper"
+            )
+
+        # Update plot layout
+        fig.update_layout(
+            xaxis_title="רבעון",
+            yaxis_title="מספר עבירות",
+            yaxis=dict(tick0=0, dtick=500),
+            plot_bgcolor="#f9f9f9",
+            xaxis=dict(categoryorder="array", categoryarray=unique_quarters),
+            legend=dict(
+                title="",
+                itemclick=False,
+                itemdoubleclick=False
+            ),
+            title=dict(
+                text="פשיעה לאורך השנים לפי סוגי עבירות",
+                x=0.5,
+                xanchor="center",
+                font=dict(size=24)
+            )
+        )
+        return fig
+
+    with col1:
+        with span("overview.trends_figure"):
+            spec = chart_specs.get_or_build(("trends", load_data_version()), build_trends_figure)
+            fig = figure_from_spec(spec, trace_visibility(spec, selected_crime_types, crime_types))
+
+        # Display the plot with full width
+        with span("overview.trends_display"):
+            st.plotly_chart(fig, use_container_width=True)